@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Complaint, UserProfile
+from .search import search_complaints
 
 
 @admin.register(Complaint)
@@ -14,8 +15,14 @@ class ComplaintAdmin(admin.ModelAdmin):
 		"status",
 		"created_at",
 	)
-	list_filter = ("status", "province", "district", "office", "category")
-	search_fields = ("title", "description", "office", "district", "province")
+	list_filter = ("status", "location__district__province", "location__district", "category")
+	search_fields = ("title", "description")
+
+	def get_search_results(self, request, queryset, search_term):
+		# Title/description go through the full-text index instead of icontains scans
+		if not search_term.strip():
+			return queryset, False
+		return search_complaints(queryset, search_term), False
 
 
 @admin.register(UserProfile)
@@ -0,0 +1,53 @@
+"""Hot/cold tiering: closed complaints move to ``ArchivedComplaint``.
+
+Resolved and Rejected complaints never change status again, so once they have
+been quiet for a while they only weigh down the hot table's indexes. The move
+keeps ids, leaves ``ComplaintStat`` counters alone (archived complaints still
+count) and writes no tombstones (sync clients keep their copy). Read endpoints
+fall through to the archive: detail and timeline lookups automatically, lists
+and exports with ``?archived=true``.
+"""
+
+from django.db import connections, transaction
+
+from . import response_cache
+from .models import CLOSED_STATUSES, ArchivedComplaint, Complaint
+
+ARCHIVE_FLAGS = ("1", "true", "yes")
+
+
+def wants_archive(params) -> bool:
+    return params.get("archived", "").lower() in ARCHIVE_FLAGS
+
+
+def archive_batch(older_than, batch_size, using="default"):
+    """Move one batch of closed complaints last updated before ``older_than``; returns the count."""
+    with transaction.atomic(using=using):
+        candidates = (
+            Complaint.objects.using(using)
+            .filter(status__in=CLOSED_STATUSES, updated_at__lt=older_than)
+            .order_by("updated_at", "id")
+        )
+        if connections[using].features.has_select_for_update_skip_locked:
+            # Rows an admin is editing right now are simply left for the next run
+            candidates = candidates.select_for_update(skip_locked=True)
+        rows = list(candidates[:batch_size])
+        if not rows:
+            return 0
+        ArchivedComplaint.objects.using(using).bulk_create(
+            [ArchivedComplaint.from_complaint(row) for row in rows], ignore_conflicts=True
+        )
+        # Raw DELETE: skip the post_delete handlers, which would write tombstones and decrement stats
+        Complaint.objects.using(using).filter(pk__in=[row.pk for row in rows])._raw_delete(using)
+        response_cache.invalidate_complaints(map(response_cache.complaint_row, rows), using=using)
+    return len(rows)
+
+
+def archive_closed_complaints(older_than, batch_size, using="default"):
+    """Archive every eligible complaint, one short transaction per batch."""
+    total = 0
+    while True:
+        moved = archive_batch(older_than, batch_size, using=using)
+        if not moved:
+            return total
+        total += moved
@@ -0,0 +1,198 @@
+"""Async versions of the hot read endpoints, for the ASGI serving profile.
+
+Mounted in place of the DRF views when ``ASYNC_READ_VIEWS`` is on (the default
+with ``DJANGO_SERVER_MODE=asgi``). GETs authenticate and query through the
+async ORM so a worker can serve other requests while one waits on the
+database. Writes fall through to the regular DRF views, so behaviour and
+response shapes match the sync API.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from . import response_cache
+from .archive import wants_archive
+from .authentication import atoken_version, claims_profile, db_user, has_claims
+from .conditional import make_etag, not_modified, set_validators
+from .filters import filter_complaints
+from .locations import get_index as get_location_index
+from .models import ArchivedComplaint, Complaint, ComplaintTombstone, UserProfile
+from .offices import directory as office_directory
+from .pagination import complaint_paginator
+from .permissions import _PROFILE_ATTR, scope_queryset
+from .serializers import ComplaintSerializer
+from .views import (
+    COMPLAINT_LIST_FIELDS,
+    LOCATIONS_MAX_AGE,
+    ComplaintViewSet,
+    complaint_list_etag,
+    locations as sync_locations,
+    me as sync_me,
+    profile_payload,
+)
+
+JSON_PARAMS = {"ensure_ascii": False}
+
+sync_complaint_list = ComplaintViewSet.as_view({"get": "list", "post": "create"})
+sync_complaint_detail = ComplaintViewSet.as_view(
+    {"get": "retrieve", "put": "update", "patch": "partial_update", "delete": "destroy"}
+)
+
+
+async def aauthenticate(request):
+    """Resolve the JWT bearer to an active user, or None."""
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else None
+    if not raw_token:
+        return None
+    try:
+        token = auth.get_validated_token(raw_token)
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except (InvalidToken, AuthenticationFailed, KeyError):
+        return None
+    if has_claims(token):
+        # Same rule as ClaimsJWTAuthentication: these views only read
+        if token["ver"] != await atoken_version(user_id):
+            return None
+        setattr(request, _PROFILE_ATTR, claims_profile(token))
+        return TokenUser(token)
+    user = await get_user_model().objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).afirst()
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+async def aget_profile(request):
+    """Async twin of ``permissions.get_profile``; later sync lookups hit the cache."""
+    if not hasattr(request, _PROFILE_ATTR):
+        setattr(request, _PROFILE_ATTR, await UserProfile.objects.filter(user_id=request.user.pk).afirst())
+    return getattr(request, _PROFILE_ATTR)
+
+
+def _csrf_exempt(view):
+    # Django 4.2's csrf_exempt decorator turns coroutines into sync views; JWT needs no CSRF
+    view.csrf_exempt = True
+    return view
+
+
+def _unauthorized():
+    return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+
+async def _authenticated(request):
+    user = await aauthenticate(request)
+    if user is None:
+        return False
+    request.user = user
+    await aget_profile(request)
+    # Scope filters and serialized rows read office names from the directory
+    await sync_to_async(office_directory.refresh_if_stale)()
+    return True
+
+
+@_csrf_exempt
+async def me(request):
+    if request.method != "GET":
+        return await sync_to_async(sync_me)(request)
+    if not await _authenticated(request):
+        return _unauthorized()
+    cache_key = response_cache.me_cache_key(request.user.pk)
+    payload = await cache.aget(cache_key) if response_cache.enabled() else None
+    if payload is None:
+        user = await sync_to_async(db_user)(request.user)
+        # Claims or one read, never a write; a missing profile reads as a citizen
+        payload = profile_payload(user, await aget_profile(request))
+        if response_cache.enabled():
+            await cache.aset(cache_key, payload, settings.RESPONSE_CACHE_SECONDS)
+    etag = make_etag("me", *payload.values())
+    response = not_modified(request, etag)
+    if response is None:
+        response = JsonResponse(payload, json_dumps_params=JSON_PARAMS)
+    return set_validators(response, etag)
+
+
+@_csrf_exempt
+async def locations(request):
+    if request.method != "GET":
+        return await sync_to_async(sync_locations)(request)
+    index = get_location_index()
+    response = not_modified(request, index.etag)
+    if response is None:
+        response = HttpResponse(index.body, content_type="application/json")
+    return set_validators(response, index.etag, private=False, max_age=LOCATIONS_MAX_AGE)
+
+
+def _page(request, queryset):
+    """Filter and paginate exactly like ``ComplaintViewSet.list``, down to the body's shape."""
+    drf_request = Request(request)
+    paginator = complaint_paginator(drf_request.query_params)
+    rows = paginator.paginate_queryset(filter_complaints(queryset, drf_request.query_params), drf_request)
+    data = ComplaintSerializer(rows, many=True, context={"request": drf_request}).data
+    # Search pages also carry ``count``; both views fill the same response-cache key
+    return paginator.get_paginated_response(data).data
+
+
+@_csrf_exempt
+async def complaint_list(request):
+    if request.method != "GET":
+        return await sync_to_async(sync_complaint_list)(request)
+    if not await _authenticated(request):
+        return _unauthorized()
+
+    cache_key = await response_cache.alist_cache_key(request)
+    cached = await cache.aget(cache_key) if cache_key else None
+    if cached:
+        etag, last_modified, payload = cached
+        response = not_modified(request, etag, last_modified) or JsonResponse(payload, json_dumps_params=JSON_PARAMS)
+        return set_validators(response, etag, last_modified)
+
+    model = ArchivedComplaint if wants_archive(request.GET) else Complaint
+    scope = await scope_queryset(request, model.objects.all()).aaggregate(count=Count("id"), last=Max("updated_at"))
+    last_deleted = (await scope_queryset(request, ComplaintTombstone.objects.all()).aaggregate(last=Max("id")))["last"]
+    etag = complaint_list_etag(request, scope, last_deleted)
+    response = not_modified(request, etag, scope["last"])
+    if response is None:
+        queryset = scope_queryset(request, model.objects.select_related("user").only(*COMPLAINT_LIST_FIELDS))
+        try:
+            # DRF's paginator is sync-only; run the page query on the ORM's thread
+            payload = await sync_to_async(_page)(request, queryset)
+        except ValidationError as exc:
+            return JsonResponse(exc.detail, status=400, safe=False)
+        response = JsonResponse(payload, json_dumps_params=JSON_PARAMS)
+        if cache_key:
+            await cache.aset(cache_key, (etag, scope["last"], payload), settings.RESPONSE_CACHE_SECONDS)
+    return set_validators(response, etag, scope["last"])
+
+
+@_csrf_exempt
+async def complaint_detail(request, pk):
+    if request.method != "GET":
+        return await sync_to_async(sync_complaint_detail)(request, pk=pk)
+    if not await _authenticated(request):
+        return _unauthorized()
+
+    instance = None
+    # Closed complaints may have moved to the archive; they stay readable
+    for model in (Complaint, ArchivedComplaint):
+        queryset = scope_queryset(request, model.objects.select_related("user").only(*COMPLAINT_LIST_FIELDS))
+        instance = await queryset.filter(pk=pk).afirst()
+        if instance is not None:
+            break
+    if instance is None:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    etag = make_etag("complaint", request.user.pk, instance.pk, instance.updated_at)
+    response = not_modified(request, etag, instance.updated_at)
+    if response is None:
+        response = JsonResponse(ComplaintSerializer(instance).data, json_dumps_params=JSON_PARAMS)
+    return set_validators(response, etag, instance.updated_at)
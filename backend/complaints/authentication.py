@@ -0,0 +1,173 @@
+"""JWTs that carry the caller's role and scope, so reads skip the user lookups.
+
+Tokens issued by the login view also hold ``role``, ``scope`` (assigned
+province/district/office), ``is_staff`` and ``ver``, the user's token
+version. On GET/HEAD/OPTIONS ``ClaimsJWTAuthentication`` builds a
+``TokenUser`` and an unsaved ``UserProfile`` from those claims instead of
+loading the ``User`` and ``UserProfile`` rows. Writes still load both, since
+they need the real user and its current role, but are refused for a stale
+``ver`` all the same.
+
+Anything that changes what a token asserts (role or assignment, staff flag,
+deactivation, password) bumps ``UserProfile.token_version``. Claim-built
+users are only accepted while ``ver`` matches the current version, which is
+read from the shared cache, and stale refresh tokens are refused, so the
+client has to log in again.
+
+Each process also remembers versions for ``TOKEN_VERSION_LOCAL_SECONDS``, so
+most reads touch neither the database nor the shared cache (which may itself
+be the database). A revocation made by another process therefore takes up to
+that long to reach this one.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import UserProfile
+from .permissions import _PROFILE_ATTR
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+VERSION_PREFIX = "auth:token-version"
+SCOPE_FIELDS = ("assigned_province", "assigned_district", "assigned_office")
+# Profile and user columns a token vouches for
+PROFILE_CLAIM_FIELDS = ("role", *SCOPE_FIELDS)
+USER_CLAIM_FIELDS = ("is_active", "is_staff", "password")
+
+
+def _version_key(user_id):
+    return f"{VERSION_PREFIX}:{user_id}"
+
+
+# Cache key -> (version, monotonic expiry), this process only. Keyed like the
+# shared cache because token claims carry the user id as a string.
+_local_versions = {}
+
+
+def _local_version(user_id):
+    entry = _local_versions.get(_version_key(user_id))
+    if entry is not None and entry[1] > time.monotonic():
+        return entry[0]
+    return None
+
+
+def _remember_version(user_id, version):
+    _local_versions[_version_key(user_id)] = (version, time.monotonic() + settings.TOKEN_VERSION_LOCAL_SECONDS)
+
+
+def token_version(user_id):
+    """Current token version of ``user_id`` (0 without a profile), cached."""
+    version = _local_version(user_id)
+    if version is not None:
+        return version
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = UserProfile.objects.filter(user_id=user_id).values_list("token_version", flat=True).first() or 0
+        cache.set(key, version, None)
+    _remember_version(user_id, version)
+    return version
+
+
+async def atoken_version(user_id):
+    version = _local_version(user_id)
+    if version is not None:
+        return version
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = await UserProfile.objects.filter(user_id=user_id).values_list("token_version", flat=True).afirst() or 0
+        await cache.aset(key, version, None)
+    _remember_version(user_id, version)
+    return version
+
+
+def forget_token_version(user_id, using=None):
+    """Drop the cached version now and again on commit, so a read racing the change cannot keep the old one."""
+
+    def forget():
+        _local_versions.pop(_version_key(user_id), None)
+        cache.delete(_version_key(user_id))
+
+    forget()
+    transaction.on_commit(forget, using=using)
+
+
+def revoke_tokens(user_id):
+    """Invalidate every token issued to ``user_id`` so far."""
+    if not UserProfile.objects.filter(user_id=user_id).update(token_version=F("token_version") + 1):
+        UserProfile.objects.get_or_create(user_id=user_id, defaults={"token_version": 1})
+    forget_token_version(user_id)
+
+
+def add_claims(token, user):
+    profile = UserProfile.objects.filter(user=user).first()
+    token["role"] = getattr(profile, "role", "user")
+    token["scope"] = [getattr(profile, field, None) for field in SCOPE_FIELDS]
+    token["is_staff"] = user.is_staff
+    token["ver"] = getattr(profile, "token_version", 0)
+    return token
+
+
+def has_claims(token):
+    return all(claim in token for claim in ("role", "scope", "is_staff", "ver"))
+
+
+def claims_profile(token):
+    """Unsaved ``UserProfile`` standing in for the caller's, for ``permissions.get_profile``."""
+    return UserProfile(
+        user_id=token[jwt_settings.USER_ID_CLAIM],
+        role=token["role"],
+        token_version=token["ver"],
+        **dict(zip(SCOPE_FIELDS, token["scope"])),
+    )
+
+
+def db_user(user):
+    """The ``User`` row behind ``user``, for code that needs more than the claims."""
+    if isinstance(user, TokenUser):
+        return get_user_model().objects.get(**{jwt_settings.USER_ID_FIELD: user.id})
+    return user
+
+
+class ScopedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_claims(super().get_token(user), user)
+
+
+class ScopedTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs["refresh"])
+        if "ver" in refresh and refresh["ver"] != token_version(refresh[jwt_settings.USER_ID_CLAIM]):
+            raise InvalidToken("Token has been revoked")
+        return super().validate(attrs)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that trusts current role/scope claims on safe methods."""
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        raw_token = self.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None
+        token = self.get_validated_token(raw_token)
+        # Revoked tokens are refused for every method, not just the reads served from claims
+        if "ver" in token and token["ver"] != token_version(token[jwt_settings.USER_ID_CLAIM]):
+            raise InvalidToken("Token has been revoked")
+        if request.method not in SAFE_METHODS or not has_claims(token):
+            # Writes need the real user; older tokens carry no claims
+            return self.get_user(token), token
+        setattr(request, _PROFILE_ATTR, claims_profile(token))
+        return TokenUser(token), token
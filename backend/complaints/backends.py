@@ -0,0 +1,74 @@
+"""Log in with a username, email address or phone number.
+
+``find_user`` resolves any of the three in one query, and each branch of it
+has an index: ``auth_user.username`` (unique), the ``LOWER(email)`` unique
+index added by migration 0015 and ``UserProfile.phone`` (stored normalized,
+unique, digits only). Emails match case-insensitively; phones ignore formatting
+and a leading ``+``.
+"""
+
+import re
+
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from .models import UserProfile, normalize_phone
+
+PHONE_RE = re.compile(r"^\+?[\d\s().-]+$")
+
+
+def normalize_email(value):
+    return (value or "").strip().lower()
+
+
+def users_by_email(email):
+    """Users whose email matches ``email`` case-insensitively (at most one)."""
+    # ``email > ''`` is the partial index's predicate, repeated so the planner uses the index
+    return User.objects.alias(email_lower=Lower("email")).filter(email_lower=normalize_email(email), email__gt="")
+
+
+def find_user(identifier):
+    """The user with this username, email or phone, or None.
+
+    Identifiers with an ``@`` are tried as usernames and emails, ones that
+    look like phone numbers as usernames and phones. If different users
+    match, a username match wins.
+    """
+    identifier = (identifier or "").strip()
+    if not identifier:
+        return None
+    match = Q(username=identifier)
+    if "@" in identifier:
+        match |= Q(email_lower=normalize_email(identifier), email__gt="")
+    elif PHONE_RE.match(identifier):
+        match |= Q(pk__in=UserProfile.objects.filter(phone=normalize_phone(identifier)).values("user_id"))
+    candidates = list(User.objects.alias(email_lower=Lower("email")).filter(match)[:3])
+
+    def rank(user):
+        if user.username == identifier:
+            return 0
+        if user.email and user.email.lower() == normalize_email(identifier):
+            return 1
+        return 2
+
+    return min(candidates, key=rank, default=None)
+
+
+class IdentifierBackend(ModelBackend):
+    """``ModelBackend`` that accepts an email or phone number in place of the username."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = find_user(username)
+        if user is None:
+            # Hash anyway so response time does not reveal whether the account exists
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,83 @@
+"""Batch status/remarks updates for admin triage."""
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import response_cache, stats
+from .events import COMPLAINT_STATUS_CHANGED, publish_complaint_event
+from .models import ComplaintStatusChange
+from .notifications import notify_citizens
+from .serializers import ComplaintBulkUpdateItemSerializer
+from .transitions import transition_error
+
+
+def _error(complaint_id, errors):
+    return {"id": complaint_id, "ok": False, "errors": errors}
+
+
+def bulk_update_complaints(queryset, items, actor=None):
+    """Validate and apply ``[{id, status, remarks}, ...]`` against ``queryset``.
+
+    ``queryset`` must already be limited to the caller's scope. Rows are fetched
+    and locked in one query, transition rules are checked in memory, and every
+    valid change is written with a single ``bulk_update``, and its history rows
+    with a single ``bulk_create``. Returns one result
+    dict per input item, in order.
+    """
+    results = [None] * len(items)
+    pending = {}
+    for index, item in enumerate(items):
+        serializer = ComplaintBulkUpdateItemSerializer(data=item)
+        if not serializer.is_valid():
+            results[index] = _error(item.get("id") if isinstance(item, dict) else None, serializer.errors)
+        elif serializer.validated_data["id"] in pending:
+            results[index] = _error(serializer.validated_data["id"], {"id": ["Duplicate id in batch."]})
+        else:
+            pending[serializer.validated_data["id"]] = (index, serializer.validated_data)
+
+    with transaction.atomic(using=queryset.db):
+        rows = {row.pk: row for row in queryset.select_for_update().filter(pk__in=pending)}
+        now = timezone.now()
+        updated, moves, changed = [], [], []
+        for complaint_id, (index, data) in pending.items():
+            row = rows.get(complaint_id)
+            if row is None:
+                results[index] = _error(complaint_id, {"id": ["Not found."]})
+                continue
+            new_status = data.get("status", row.status)
+            error = transition_error(row.status, new_status)
+            if error:
+                results[index] = _error(complaint_id, {"status": [error]})
+                continue
+
+            old_key = row.stat_key()
+            previous = (row.status, row.remarks)
+            row.status = new_status
+            if "remarks" in data:
+                row.remarks = data["remarks"]
+            row.updated_at = now
+            moves.append((old_key, row.stat_key()))
+            updated.append(row)
+            if (row.status, row.remarks) != previous:
+                changed.append(row)
+            results[index] = {"id": complaint_id, "ok": True, "status": row.status, "remarks": row.remarks}
+
+        if updated:
+            queryset.model.objects.using(queryset.db).bulk_update(updated, ["status", "remarks", "updated_at"])
+            stats.apply_moves(moves, using=queryset.db)
+            response_cache.invalidate_complaints(map(response_cache.complaint_row, updated), using=queryset.db)
+            # History only for rows whose status or remarks changed, as for single updates
+            changed_ids = {row.pk for row in changed}
+            ComplaintStatusChange.objects.using(queryset.db).bulk_create(
+                [
+                    ComplaintStatusChange.for_complaint(row, old_key[-1], getattr(actor, "pk", None))
+                    for row, (old_key, _) in zip(updated, moves)
+                    if row.pk in changed_ids
+                ]
+            )
+            for row, (old_key, new_key) in zip(updated, moves):
+                if old_key[-1] != new_key[-1]:
+                    publish_complaint_event(COMPLAINT_STATUS_CHANGED, row, previous_status=old_key[-1], using=queryset.db)
+            # One row per complaint; the worker folds them into one email per citizen
+            notify_citizens(changed, using=queryset.db)
+    return results
@@ -0,0 +1,35 @@
+"""ETag/Last-Modified helpers so unchanged reads answer 304 before serializing."""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.md5("|".join(str(part) for part in parts).encode(), usedforsecurity=False)
+    return f'"{digest.hexdigest()}"'
+
+
+def not_modified(request, etag=None, last_modified=None):
+    """Return a 304 response if the client's validators still match, else None.
+
+    ``last_modified`` is a datetime (or None); ``request`` may be a DRF request.
+    Pass the returned response through ``set_validators`` like a normal one.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(getattr(request, "_request", request), etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag=None, last_modified=None, private=True, max_age=0):
+    if etag:
+        response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    if private:
+        # Per-user content: shared caches must not serve it to someone else
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Authorization"])
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
+    return response
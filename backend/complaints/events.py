@@ -0,0 +1,173 @@
+"""Complaint change events for the server-sent events stream.
+
+``publish_complaint_event`` is called from the write paths (signals and bulk
+updates). The configured broker (``COMPLAINT_EVENTS_BROKER``) fans events out
+to subscribers, each of which only receives events inside its own scope:
+
+* ``LocalBroker`` delivers within one process after the write commits. Use it
+  with a single ASGI worker.
+* ``DatabaseBroker`` writes each event to ``ComplaintEvent`` in the same
+  transaction as the change. Every worker runs one poller that reads new rows
+  and fans them out to its local subscribers, so any number of workers share
+  one stream of events.
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import ComplaintEvent
+
+logger = logging.getLogger(__name__)
+
+COMPLAINT_CREATED = "complaint.created"
+COMPLAINT_STATUS_CHANGED = "complaint.status_changed"
+
+
+def build_event(kind, complaint, previous_status=None):
+    return {
+        "type": kind,
+        "id": complaint.pk,
+        "user_id": complaint.user_id,
+        "title": complaint.title,
+        "province": complaint.province,
+        "district": complaint.district,
+        "office": complaint.office,
+        "status": complaint.status,
+        "previous_status": previous_status,
+        "updated_at": complaint.updated_at.isoformat() if complaint.updated_at else None,
+    }
+
+
+def scope_matcher(user_id, admin, profile=None):
+    """Return a predicate selecting the events a subscriber may see."""
+    if not admin:
+        # Claim-built users carry the JWT's string user id; events carry the integer column
+        user_id = int(user_id)
+        return lambda event: event["user_id"] == user_id
+    scope = {}
+    if profile:
+        scope = {
+            "province": profile.assigned_province,
+            "district": profile.assigned_district,
+            "office": profile.assigned_office,
+        }
+    scope = {field: value for field, value in scope.items() if value}
+    return lambda event: all(event[field] == value for field, value in scope.items())
+
+
+class Subscription:
+    def __init__(self, match, loop, maxsize):
+        self.match = match
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, event):
+        """Queue ``event``; runs on the subscriber's loop."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: end the stream so the client reconnects and resyncs
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class LocalBroker:
+    """In-process fan-out. ``publish`` may be called from any thread."""
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event, using=None):
+        transaction.on_commit(lambda: self.dispatch(event), using=using)
+
+    def dispatch(self, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if not subscription.match(event):
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The subscriber's event loop has shut down
+                self.unsubscribe(subscription)
+
+    async def subscribe(self, match):
+        subscription = Subscription(match, asyncio.get_running_loop(), settings.COMPLAINT_EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+
+class DatabaseBroker(LocalBroker):
+    """Cross-process fan-out through the ``ComplaintEvent`` table."""
+
+    def __init__(self):
+        super().__init__()
+        self._poller = None
+
+    def publish(self, event, using=None):
+        # Written inside the caller's transaction, so it commits (or not) with the change
+        ComplaintEvent.objects.using(using).create(
+            kind=event["type"],
+            complaint_id=event["id"],
+            user_id=event["user_id"],
+            province=event["province"],
+            district=event["district"],
+            office=event["office"],
+            payload=event,
+        )
+
+    async def subscribe(self, match):
+        subscription = await super().subscribe(match)
+        if self._poller is None or self._poller.done():
+            last = await ComplaintEvent.objects.order_by("-id").values_list("id", flat=True).afirst()
+            # Fresh context: the poller outlives the request that happened to start it
+            self._poller = contextvars.Context().run(asyncio.get_running_loop().create_task, self._poll(last or 0))
+        return subscription
+
+    async def _poll(self, last_id):
+        interval = settings.COMPLAINT_EVENTS_POLL_INTERVAL
+        retention = timedelta(seconds=settings.COMPLAINT_EVENTS_RETENTION)
+        next_prune = timezone.now()
+        while self.subscriber_count:
+            try:
+                rows = ComplaintEvent.objects.filter(id__gt=last_id).order_by("id").values_list("id", "payload")
+                async for event_id, payload in rows[:500]:
+                    last_id = event_id
+                    self.dispatch(payload)
+                if timezone.now() >= next_prune:
+                    await ComplaintEvent.objects.filter(created_at__lt=timezone.now() - retention).adelete()
+                    next_prune = timezone.now() + timedelta(minutes=1)
+            except Exception:
+                logger.exception("Complaint event poll failed")
+            await asyncio.sleep(interval)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.COMPLAINT_EVENTS_BROKER)()
+
+
+def publish_complaint_event(kind, complaint, previous_status=None, using=None):
+    get_broker().publish(build_event(kind, complaint, previous_status), using=using)
@@ -0,0 +1,67 @@
+"""Query-string filters for complaint listings."""
+
+import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .offices import directory
+from .search import search_complaints
+
+
+def _parse_timestamp(name: str, value: str) -> datetime.datetime:
+    try:
+        parsed = parse_datetime(value)
+        day = None if parsed else parse_date(value)
+    except ValueError:
+        parsed = day = None
+    if parsed is None:
+        if day is None:
+            raise ValidationError({name: "Use an ISO 8601 date or datetime."})
+        parsed = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, datetime.timezone.utc)
+    return parsed
+
+
+def _csv(value: str):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def filter_complaints(queryset, params):
+    """Apply ``status``, ``category``, ``office``, ``created_after``/``created_before`` and ``q``.
+
+    ``status``, ``category`` and ``office`` accept comma-separated values.
+    ``created_before`` is exclusive. ``q`` runs a ranked full-text search and
+    annotates each row with ``search_rank``.
+    """
+    for param, field in (("status", "status"), ("category", "category")):
+        values = _csv(params.get(param, ""))
+        if len(values) == 1:
+            queryset = queryset.filter(**{field: values[0]})
+        elif values:
+            queryset = queryset.filter(**{f"{field}__in": values})
+
+    # Office names can repeat across districts; match every office with that name
+    offices = _csv(params.get("office", ""))
+    if offices:
+        queryset = queryset.filter(
+            location_id__in=[office_id for name in offices for office_id in directory.scope_ids(office=name)[1]]
+        )
+
+    if params.get("created_after"):
+        queryset = queryset.filter(created_at__gte=_parse_timestamp("created_after", params["created_after"]))
+    if params.get("created_before"):
+        queryset = queryset.filter(created_at__lt=_parse_timestamp("created_before", params["created_before"]))
+
+    query = params.get("q", "").strip()
+    if query:
+        queryset = search_complaints(queryset, query)
+    return queryset
+
+
+class ComplaintFilterBackend(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        return filter_complaints(queryset, request.query_params)
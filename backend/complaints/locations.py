@@ -1,66 +1,124 @@
-"""Static Nepal location map used for routing complaints to offices."""
-
-from typing import Dict, List
-
-# Province -> District -> Offices
-# Simplified to Bagmati Province only
-LOCATION_DATA: Dict[str, Dict[str, List[str]]] = {
-    "Bagmati": {
-        "Kathmandu": [
-            "Ward Office",
-            "Municipality Office",
-            "Electricity Authority",
-            "Water Supply",
-            "Police (Non-Emergency)",
-            "University Administration",
-        ],
-        "Lalitpur": [
-            "Ward Office",
-            "Municipality Office",
-            "Electricity Authority",
-            "Water Supply",
-            "Police (Non-Emergency)",
-            "University Administration",
-        ],
-        "Bhaktapur": [
-            "Ward Office",
-            "Municipality Office",
-            "Electricity Authority",
-            "Water Supply",
-            "Police (Non-Emergency)",
-            "University Administration",
-        ],
-        "Chitwan": [
-            "Ward Office",
-            "Municipality Office",
-            "Electricity Authority",
-            "Water Supply",
-            "Police (Non-Emergency)",
-            "University Administration",
-        ],
-        "Makwanpur": [
-            "Ward Office",
-            "Municipality Office",
-            "Electricity Authority",
-            "Water Supply",
-            "Police (Non-Emergency)",
-            "University Administration",
-        ],
-    },
-}
-
-
-def get_provinces() -> List[str]:
-    return sorted(LOCATION_DATA.keys())
-
-
-def get_districts(province: str) -> List[str]:
-    return sorted(LOCATION_DATA.get(province, {}).keys())
-
-
-def get_offices(province: str, district: str) -> List[str]:
-    return LOCATION_DATA.get(province, {}).get(district, [])
+"""Nepal location catalog (province -> district -> offices) used for routing complaints.
+
+The catalog comes from ``settings.LOCATION_CATALOG``: a ``.json`` file (the
+bundled ``data/locations.json`` covers all 7 provinces and 77 districts) or the
+dotted path of a callable returning ``{province: {district: [offices]}}``, e.g.
+one that reads a database table. It is compiled once into an immutable
+``LocationIndex``: a frozenset of valid triples for validation, pre-sorted
+tuples for the pickers and the pre-serialized ``locations/`` body. Call
+``reload_catalog()`` after the source changes.
+"""
+
+import json
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Sequence, Tuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .conditional import make_etag
+
+DEFAULT_CATALOG = Path(__file__).resolve().parent / "data" / "locations.json"
+
+
+class LocationIndex(NamedTuple):
+    provinces: Tuple[str, ...]
+    districts: Mapping[str, Tuple[str, ...]]
+    offices: Mapping[Tuple[str, str], Tuple[str, ...]]
+    triples: frozenset
+    data: Mapping[str, Mapping[str, Tuple[str, ...]]]
+    body: bytes
+    etag: str
+
+
+def load_json_catalog(path) -> dict:
+    """Read a catalog file into ``{province: {district: [offices]}}``.
+
+    Either that nested shape, or the compact one used by the bundled file:
+    ``default_offices``, ``provinces`` (province -> districts) and optional
+    ``district_offices`` overrides.
+    """
+    with open(path, encoding="utf-8") as handle:
+        raw = json.load(handle)
+    if "provinces" not in raw:
+        return raw
+    overrides = raw.get("district_offices", {})
+    return {
+        province: {district: overrides.get(district, raw["default_offices"]) for district in districts}
+        for province, districts in raw["provinces"].items()
+    }
+
+
+def build_index(catalog: Mapping[str, Mapping[str, Sequence[str]]]) -> LocationIndex:
+    provinces = tuple(sorted(catalog))
+    districts = {province: tuple(sorted(catalog[province])) for province in provinces}
+    # Offices keep the catalog's order: it is the order offered to citizens
+    offices = {
+        (province, district): tuple(dict.fromkeys(catalog[province][district]))
+        for province in provinces
+        for district in districts[province]
+    }
+    data = {
+        province: MappingProxyType({district: offices[province, district] for district in districts[province]})
+        for province in provinces
+    }
+    payload = {"provinces": provinces, "districts": districts, "offices": data}
+    body = json.dumps(payload, ensure_ascii=False, default=dict, separators=(",", ":")).encode()
+    return LocationIndex(
+        provinces=provinces,
+        districts=MappingProxyType(districts),
+        offices=MappingProxyType(offices),
+        triples=frozenset((province, district, office) for (province, district), names in offices.items() for office in names),
+        data=MappingProxyType(data),
+        body=body,
+        etag=make_etag(body.decode()),
+    )
+
+
+def load_catalog(source=None) -> dict:
+    source = str(source or getattr(settings, "LOCATION_CATALOG", "") or DEFAULT_CATALOG)
+    if source.endswith(".json"):
+        return load_json_catalog(source)
+    return import_string(source)()
+
+
+_index = None
+
+
+def get_index() -> LocationIndex:
+    global _index
+    if _index is None:
+        _index = build_index(load_catalog())
+    return _index
+
+
+def reload_catalog(catalog=None) -> LocationIndex:
+    """Rebuild the index from ``catalog`` (or the configured source) and swap it in."""
+    global _index
+    _index = build_index(catalog if catalog is not None else load_catalog())
+    return _index
+
+
+@receiver(setting_changed)
+def _reload_on_setting_change(setting, **kwargs):
+    if setting == "LOCATION_CATALOG":
+        reload_catalog()
+
+
+def get_provinces() -> Sequence[str]:
+    return get_index().provinces
+
+
+def get_districts(province: str) -> Sequence[str]:
+    return get_index().districts.get(province, ())
+
+
+def get_offices(province: str, district: str) -> Sequence[str]:
+    return get_index().offices.get((province, district), ())
 
 
 def is_valid_location(province: str, district: str, office: str) -> bool:
-    return office in get_offices(province, district)
+    return (province, district, office) in get_index().triples
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from complaints.archive import archive_closed_complaints
+
+
+class Command(BaseCommand):
+    help = "Move Resolved/Rejected complaints untouched for --days into the archive table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.COMPLAINT_ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=settings.COMPLAINT_ARCHIVE_BATCH_SIZE)
+        parser.add_argument("--database", default="default", help="Database alias to archive")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        moved = archive_closed_complaints(cutoff, options["batch_size"], using=options["database"])
+        self.stdout.write(self.style.SUCCESS(f"✓ Archived {moved} closed complaints last updated before {cutoff:%Y-%m-%d}"))
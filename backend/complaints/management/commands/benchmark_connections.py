@@ -0,0 +1,76 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request database connection overhead with a fresh connection per request "
+        "(CONN_MAX_AGE=0) versus the configured persistent connections"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Simulated requests per run")
+        parser.add_argument("--database", default="default", help="Database alias to measure")
+        parser.add_argument(
+            "--max-age", type=int, default=None,
+            help="CONN_MAX_AGE for the persistent run (default: the configured value, or 60 if that is 0)",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        configured = connection.settings_dict.get("CONN_MAX_AGE", 0)
+        max_age = options["max_age"] if options["max_age"] is not None else (configured or 60)
+
+        self.stdout.write(
+            f"{options['requests']} requests against {options['database']} ({connection.vendor}), "
+            f"health checks {'on' if connection.settings_dict.get('CONN_HEALTH_CHECKS') else 'off'}"
+        )
+        self.stdout.write(f"{'CONN_MAX_AGE':<14} {'connects':>9} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+        means = []
+        try:
+            for age in (0, max_age):
+                connects, latencies = self.run(connection, age, options["requests"])
+                ordered = sorted(latencies)
+                means.append(statistics.fmean(ordered))
+                self.stdout.write(
+                    f"{age:<14} {connects:>9} {statistics.median(ordered) * 1000:>9.3f} "
+                    f"{ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000:>9.3f} "
+                    f"{statistics.fmean(ordered) * 1000:>9.3f}"
+                )
+        finally:
+            connection.settings_dict["CONN_MAX_AGE"] = configured
+            connection.close()
+
+        fresh, persistent = means
+        self.stdout.write(self.style.SUCCESS(f"✓ Connection overhead per request: {(fresh - persistent) * 1000:.3f} ms"))
+
+    def run(self, connection, max_age, requests):
+        """Time ``requests`` request cycles, each running one trivial query."""
+        connection.close()
+        connection.settings_dict["CONN_MAX_AGE"] = max_age
+        connects = 0
+
+        def count(sender, connection, **kwargs):
+            nonlocal connects
+            connects += 1
+
+        connection_created.connect(count, weak=False)
+        latencies = []
+        try:
+            for _ in range(requests):
+                start = time.perf_counter()
+                # The same signals Django's request handler sends; they close expired connections
+                request_started.send(sender=self.__class__)
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+                request_finished.send(sender=self.__class__)
+                latencies.append(time.perf_counter() - start)
+        finally:
+            connection_created.disconnect(count)
+        return connects, latencies
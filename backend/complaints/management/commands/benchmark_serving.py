@@ -0,0 +1,174 @@
+import asyncio
+import io
+import statistics
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework_simplejwt.tokens import AccessToken
+
+DEFAULT_PATHS = ["/api/locations/", "/api/me/", "/api/complaints/", "/api/complaints/stats/"]
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/sec and latency percentiles of the WSGI and ASGI stacks under concurrent load. "
+        "By default both applications are driven in-process (no network); pass --url to load a running server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mode", choices=["wsgi", "asgi", "both"], default="both")
+        parser.add_argument("--url", help="Base URL of a running server, e.g. http://127.0.0.1:8000")
+        parser.add_argument("--requests", type=int, default=2000, help="Total requests per mode")
+        parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once")
+        parser.add_argument("--path", action="append", dest="paths", help="Path to request (repeatable)")
+        parser.add_argument("--user", help="Username to authenticate as (default: first active user)")
+        parser.add_argument(
+            "--db-latency-ms", type=float, default=0.0,
+            help="Add this much latency to every query, to mimic a remote database",
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.filter(is_active=True)
+        user = users.filter(username=options["user"]).first() if options["user"] else users.order_by("id").first()
+        if user is None:
+            raise CommandError("No user to authenticate as; create one or pass --user")
+        self.token = str(AccessToken.for_user(user))
+        self.paths = options["paths"] or DEFAULT_PATHS
+
+        if options["db_latency_ms"]:
+            self._add_db_latency(options["db_latency_ms"] / 1000)
+
+        modes = ["wsgi", "asgi"] if options["mode"] == "both" else [options["mode"]]
+        if options["url"]:
+            modes = ["http"]
+
+        self.stdout.write(
+            f"{options['requests']} requests, concurrency {options['concurrency']}, user {user.username}, "
+            f"paths {', '.join(self.paths)}"
+        )
+        self.stdout.write(f"{'mode':<6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for mode in modes:
+            runner = {"wsgi": self._run_wsgi, "asgi": self._run_asgi, "http": self._run_http}[mode]
+            latencies, errors, elapsed = runner(options["requests"], options["concurrency"], options["url"])
+            self.stdout.write(
+                f"{mode:<6} {len(latencies) / elapsed:>9.1f} {statistics.median(latencies) * 1000:>9.2f} "
+                f"{_percentile(latencies, 0.99) * 1000:>9.2f} {errors:>7}"
+            )
+
+    def _add_db_latency(self, seconds):
+        def slow(execute, sql, params, many, context):
+            time.sleep(seconds)
+            return execute(sql, params, many, context)
+
+        def install(sender, connection, **kwargs):
+            connection.execute_wrappers.append(slow)
+
+        connection_created.connect(install, weak=False)
+        for connection in connections.all():
+            connection.execute_wrappers.append(slow)
+
+    def _path(self, index):
+        return self.paths[index % len(self.paths)]
+
+    def _run_wsgi(self, total, concurrency, url):
+        from core.wsgi import application
+
+        def call(index):
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": self._path(index),
+                "QUERY_STRING": "",
+                "SERVER_NAME": "localhost",
+                "SERVER_PORT": "80",
+                "HTTP_HOST": "localhost",
+                "HTTP_AUTHORIZATION": f"Bearer {self.token}",
+                "wsgi.input": io.BytesIO(),
+                "wsgi.errors": sys.stderr,
+                "wsgi.url_scheme": "http",
+            }
+            statuses = []
+            start = time.perf_counter()
+            body = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+            b"".join(body)
+            getattr(body, "close", lambda: None)()
+            return time.perf_counter() - start, statuses[0].startswith("2")
+
+        return self._collect_threads(call, total, concurrency)
+
+    def _run_http(self, total, concurrency, url):
+        def call(index):
+            request = urllib.request.Request(
+                url.rstrip("/") + self._path(index), headers={"Authorization": f"Bearer {self.token}"}
+            )
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                    ok = 200 <= response.status < 300
+            except OSError:
+                ok = False
+            return time.perf_counter() - start, ok
+
+        return self._collect_threads(call, total, concurrency)
+
+    def _collect_threads(self, call, total, concurrency):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(call, range(total)))
+        elapsed = time.perf_counter() - start
+        return [latency for latency, _ in results], sum(1 for _, ok in results if not ok), elapsed
+
+    def _run_asgi(self, total, concurrency, url):
+        from core.asgi import application
+
+        async def call(index):
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": self._path(index),
+                "raw_path": self._path(index).encode(),
+                "query_string": b"",
+                "headers": [(b"host", b"localhost"), (b"authorization", f"Bearer {self.token}".encode())],
+                "server": ("localhost", 80),
+                "client": ("127.0.0.1", 50000),
+            }
+            messages = []
+
+            async def receive():
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def send(message):
+                messages.append(message)
+
+            start = time.perf_counter()
+            await application(scope, receive, send)
+            return time.perf_counter() - start, 200 <= messages[0]["status"] < 300
+
+        async def run():
+            queue = iter(range(total))
+            results = []
+
+            async def worker():
+                for index in queue:
+                    results.append(await call(index))
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return results, time.perf_counter() - start
+
+        results, elapsed = asyncio.run(run())
+        return [latency for latency, _ in results], sum(1 for _, ok in results if not ok), elapsed
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from complaints.locations import get_districts, get_offices, get_provinces
+from complaints.models import OPEN_STATUSES, Complaint
+
+
+class Command(BaseCommand):
+    help = "Print the EXPLAIN plan for each complaint list scope query"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--province", help="Province for the admin scope queries")
+        parser.add_argument("--district", help="District for the admin scope queries")
+        parser.add_argument("--office", help="Office for the admin scope queries")
+        parser.add_argument("--user-id", type=int, default=1, help="User id for the citizen query")
+        parser.add_argument("--analyze", action="store_true", help="Run EXPLAIN ANALYZE (PostgreSQL only)")
+
+    def handle(self, *args, **options):
+        province = options["province"] or next(iter(get_provinces()), "")
+        district = options["district"] or next(iter(get_districts(province)), "")
+        office = options["office"] or next(iter(get_offices(province, district)), "")
+
+        queries = [
+            ("staff (unscoped)", Complaint.objects.all()),
+            ("admin province", Complaint.objects.in_scope(province)),
+            ("admin district", Complaint.objects.in_scope(province, district)),
+            ("admin office", Complaint.objects.in_scope(province, district, office)),
+            ("admin office, open only", Complaint.objects.in_scope(province, district, office).filter(status__in=OPEN_STATUSES)),
+            ("citizen", Complaint.objects.filter(user_id=options["user_id"])),
+            ("citizen, open only", Complaint.objects.filter(user_id=options["user_id"], status__in=OPEN_STATUSES)),
+        ]
+
+        explain_options = {}
+        if options["analyze"] and connection.vendor == "postgresql":
+            explain_options = {"analyze": True, "buffers": True}
+
+        self.stdout.write(f"Database vendor: {connection.vendor}")
+        for label, queryset in queries:
+            queryset = queryset.newest_first()
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label} =="))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain(**explain_options))
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from complaints.notifications import queue_digests
+from complaints.outbox import process_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue due citizen digest emails, then deliver queued emails and SMS from the outbox; "
+        "runs until stopped unless --once is given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument(
+            "--interval", type=float, default=settings.OUTBOX_POLL_INTERVAL,
+            help="Seconds to sleep when nothing is due",
+        )
+        parser.add_argument("--once", action="store_true", help="Deliver what is due now, then exit")
+        parser.add_argument("--database", default="default", help="Database alias holding the outbox")
+
+    def handle(self, *args, **options):
+        batch_size, using = options["batch_size"], options["database"]
+        while True:
+            digests = 0
+            while True:
+                queued = queue_digests(batch_size, using=using)
+                digests += queued
+                if queued < batch_size:
+                    break
+            sent, failed = process_outbox(batch_size, using=using)
+            if digests or sent or failed or options["once"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"✓ Queued {digests} digests; delivered {sent} messages ({failed} failed, will retry or give up)"
+                ))
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from complaints import stats
+from complaints.models import ComplaintStat
+
+
+class Command(BaseCommand):
+    help = "Rebuild the complaint statistics summary table from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default", help="Database alias to rebuild")
+
+    def handle(self, *args, **options):
+        stats.rebuild(using=options["database"])
+        buckets = ComplaintStat.objects.using(options["database"]).count()
+        self.stdout.write(self.style.SUCCESS(f"✓ Rebuilt complaint statistics ({buckets} buckets)"))
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from complaints.models import UserProfile, normalize_phone
+
+
+class Command(BaseCommand):
+    help = (
+        "Give every shared email and phone number to one account, so migrations 0015 and 0019 can index them. "
+        "An email stays with the account whose username is that email, else the oldest; a phone stays with "
+        "the oldest account. The others lose it and can still log in with their usernames."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without changing it")
+        parser.add_argument("--database", default="default", help="Database alias to clean up")
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        User = get_user_model()
+
+        # Only the columns every schema version has, so this runs before the migrations that need it
+        by_email = {}
+        for user_id, username, email in (
+            User.objects.using(using).exclude(email="").order_by("date_joined", "id").values_list("id", "username", "email")
+        ):
+            by_email.setdefault(email.lower(), []).append((user_id, username))
+        by_phone = {}
+        for user_id, username, phone in (
+            UserProfile.objects.using(using).exclude(phone=None).order_by("user__date_joined", "user_id")
+            .values_list("user_id", "user__username", "phone")
+        ):
+            if normalize_phone(phone):
+                by_phone.setdefault(normalize_phone(phone), []).append((user_id, username))
+
+        cleared_emails, cleared_phones = [], []
+        for email, users in by_email.items():
+            if len(users) > 1:
+                keeper = next((user for user in users if user[1].lower() == email), users[0])
+                cleared_emails += [user[0] for user in users if user != keeper]
+                self.report("email", email, keeper, users)
+        for phone, users in by_phone.items():
+            if len(users) > 1:
+                cleared_phones += [user[0] for user in users[1:]]
+                self.report("phone", phone, users[0], users)
+
+        if not (cleared_emails or cleared_phones):
+            self.stdout.write(self.style.SUCCESS("✓ No shared emails or phone numbers"))
+            return
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry run: nothing was changed"))
+            return
+        with transaction.atomic(using=using):
+            User.objects.using(using).filter(pk__in=cleared_emails).update(email="")
+            UserProfile.objects.using(using).filter(user_id__in=cleared_phones).update(phone=None)
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Cleared {len(cleared_emails)} emails and {len(cleared_phones)} phone numbers"
+        ))
+
+    def report(self, kind, value, keeper, users):
+        others = ", ".join(f"{user_id} ({username})" for user_id, username in users if (user_id, username) != keeper)
+        self.stdout.write(f"{kind} {value}: kept by {keeper[0]} ({keeper[1]}); cleared from {others}")
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0006_complaint_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('complaint_id', models.BigIntegerField()),
+                ('user_id', models.IntegerField()),
+                ('province', models.CharField(blank=True, max_length=100, null=True)),
+                ('district', models.CharField(blank=True, max_length=100, null=True)),
+                ('office', models.CharField(blank=True, max_length=100, null=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='complaint_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['province', 'district', 'office', 'updated_at', 'id'], name='complaint_scope_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complainttombstone',
+            index=models.Index(fields=['user_id', 'id'], name='tombstone_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complainttombstone',
+            index=models.Index(fields=['province', 'district', 'office', 'id'], name='tombstone_scope_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_stats(apps, schema_editor):
+    Complaint = apps.get_model("complaints", "Complaint")
+    ComplaintStat = apps.get_model("complaints", "ComplaintStat")
+    db = schema_editor.connection.alias
+    key_fields = ("province", "district", "office", "category", "status")
+    grouped = Complaint.objects.using(db).order_by().values_list(*key_fields).annotate(total=Count("id"))
+    totals = Counter()
+    for *key, total in grouped:
+        # Blank and NULL locations share a bucket
+        totals[tuple(value or "" for value in key)] += total
+    ComplaintStat.objects.using(db).bulk_create(
+        [ComplaintStat(count=total, **dict(zip(key_fields, key))) for key, total in totals.items()],
+        batch_size=1000,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0007_complaint_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('province', models.CharField(blank=True, default='', max_length=100)),
+                ('district', models.CharField(blank=True, default='', max_length=100)),
+                ('office', models.CharField(blank=True, default='', max_length=100)),
+                ('category', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('In Progress', 'In Progress'), ('Rejected', 'Rejected'), ('Resolved', 'Resolved')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='complaintstat',
+            constraint=models.UniqueConstraint(fields=('province', 'district', 'office', 'category', 'status'), name='complaint_stat_key_unique'),
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0009_complaint_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('complaint_id', models.BigIntegerField()),
+                ('actor_id', models.IntegerField(blank=True, null=True)),
+                ('from_status', models.CharField(choices=[('Pending', 'Pending'), ('In Progress', 'In Progress'), ('Rejected', 'Rejected'), ('Resolved', 'Resolved')], max_length=20)),
+                ('to_status', models.CharField(choices=[('Pending', 'Pending'), ('In Progress', 'In Progress'), ('Rejected', 'Rejected'), ('Resolved', 'Resolved')], max_length=20)),
+                ('remarks', models.TextField(blank=True, null=True)),
+                ('province', models.CharField(blank=True, max_length=100, null=True)),
+                ('district', models.CharField(blank=True, max_length=100, null=True)),
+                ('office', models.CharField(blank=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['complaint_id', 'created_at'], name='status_change_timeline_idx'), models.Index(fields=['province', 'district', 'office', '-id'], name='status_change_scope_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('complaints', '0010_complaint_status_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedComplaint',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('category', models.CharField(max_length=100)),
+                ('province', models.CharField(blank=True, max_length=100, null=True)),
+                ('district', models.CharField(blank=True, max_length=100, null=True)),
+                ('office', models.CharField(blank=True, max_length=100, null=True)),
+                ('remarks', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('In Progress', 'In Progress'), ('Rejected', 'Rejected'), ('Resolved', 'Resolved')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('status__in', ('Resolved', 'Rejected'))), fields=['updated_at', 'id'], name='complaint_closed_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomplaint',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_complaints', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomplaint',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='archived_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomplaint',
+            index=models.Index(fields=['province', 'district', 'office', '-created_at', '-id'], name='archived_scope_created_idx'),
+        ),
+    ]
@@ -0,0 +1,238 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+LOCATED_MODELS = ("Complaint", "ArchivedComplaint")
+
+# Frozen copies, so this migration keeps doing the same thing as the app code
+# evolves: the bundled catalog (complaints/data/locations.json, where every
+# district had the default offices) ...
+CATALOG_OFFICES = (
+    "Ward Office",
+    "Municipality Office",
+    "Electricity Authority",
+    "Water Supply",
+    "Police (Non-Emergency)",
+    "University Administration",
+)
+CATALOG_DISTRICTS = {
+    "Koshi": [
+        "Bhojpur", "Dhankuta", "Ilam", "Jhapa", "Khotang", "Morang", "Okhaldhunga", "Panchthar",
+        "Sankhuwasabha", "Solukhumbu", "Sunsari", "Taplejung", "Terhathum", "Udayapur",
+    ],
+    "Madhesh": [
+        "Bara", "Dhanusha", "Mahottari", "Parsa", "Rautahat", "Saptari", "Sarlahi", "Siraha",
+    ],
+    "Bagmati": [
+        "Bhaktapur", "Chitwan", "Dhading", "Dolakha", "Kathmandu", "Kavrepalanchok", "Lalitpur", "Makwanpur",
+        "Nuwakot", "Ramechhap", "Rasuwa", "Sindhuli", "Sindhupalchok",
+    ],
+    "Gandaki": [
+        "Baglung", "Gorkha", "Kaski", "Lamjung", "Manang", "Mustang", "Myagdi", "Nawalpur", "Parbat",
+        "Syangja", "Tanahun",
+    ],
+    "Lumbini": [
+        "Arghakhanchi", "Banke", "Bardiya", "Dang", "Eastern Rukum", "Gulmi", "Kapilvastu", "Palpa", "Parasi",
+        "Pyuthan", "Rolpa", "Rupandehi",
+    ],
+    "Karnali": [
+        "Dailekh", "Dolpa", "Humla", "Jajarkot", "Jumla", "Kalikot", "Mugu", "Salyan", "Surkhet",
+        "Western Rukum",
+    ],
+    "Sudurpashchim": [
+        "Achham", "Baitadi", "Bajhang", "Bajura", "Dadeldhura", "Darchula", "Doti", "Kailali", "Kanchanpur",
+    ],
+}
+
+FTS_TABLE = "complaints_complaint_fts"
+# ... and the SQLite FTS5 triggers created by 0006_complaint_search
+SQLITE_TRIGGER_SQL = [
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON complaints_complaint BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON complaints_complaint BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+    f"VALUES ('delete', old.id, old.title, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON complaints_complaint BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+    f"VALUES ('delete', old.id, old.title, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def populate_offices(apps, schema_editor):
+    """Create the hierarchy from the catalog plus any triple already in use, then point rows at it.
+
+    Rows missing any of the three names never passed validation; they are left
+    without a location.
+    """
+    Province = apps.get_model("complaints", "Province")
+    District = apps.get_model("complaints", "District")
+    Office = apps.get_model("complaints", "Office")
+    db = schema_editor.connection.alias
+
+    triples = {
+        (province, district, office)
+        for province, districts in CATALOG_DISTRICTS.items()
+        for district in districts
+        for office in CATALOG_OFFICES
+    }
+    for name in LOCATED_MODELS:
+        triples.update(
+            apps.get_model("complaints", name).objects.using(db)
+            .filter(province__gt="", district__gt="", office__gt="")
+            .values_list("province", "district", "office")
+            .distinct()
+        )
+
+    office_ids = {}
+    for province, district, office in sorted(triples):
+        province_row, _ = Province.objects.using(db).get_or_create(name=province)
+        district_row, _ = District.objects.using(db).get_or_create(province=province_row, name=district)
+        office_ids[province, district, office] = (
+            Office.objects.using(db).get_or_create(district=district_row, name=office)[0].pk
+        )
+
+    for name in LOCATED_MODELS:
+        rows = apps.get_model("complaints", name).objects.using(db)
+        for (province, district, office), office_id in office_ids.items():
+            rows.filter(province=province, district=district, office=office).update(location_id=office_id)
+
+
+def restore_location_names(apps, schema_editor):
+    Office = apps.get_model("complaints", "Office")
+    db = schema_editor.connection.alias
+    offices = Office.objects.using(db).values_list("id", "district__province__name", "district__name", "name")
+    for name in LOCATED_MODELS:
+        rows = apps.get_model("complaints", name).objects.using(db)
+        for office_id, province, district, office in offices:
+            rows.filter(location_id=office_id).update(province=province, district=district, office=office)
+
+
+def recreate_search_triggers(apps, schema_editor):
+    # Rebuilding the complaint table on SQLite drops the FTS triggers from 0006
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        has_fts = cursor.fetchone() is not None
+    if has_fts:
+        for statement in SQLITE_TRIGGER_SQL:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0012_cache_table'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Province',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='District',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Office',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='district',
+            name='province',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='districts', to='complaints.province'),
+        ),
+        migrations.AddField(
+            model_name='office',
+            name='district',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='offices', to='complaints.district'),
+        ),
+        migrations.AddConstraint(
+            model_name='district',
+            constraint=models.UniqueConstraint(fields=('province', 'name'), name='district_name_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='office',
+            constraint=models.UniqueConstraint(fields=('district', 'name'), name='office_name_unique'),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='location',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='complaints.office'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomplaint',
+            name='location',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='complaints.office'),
+        ),
+        migrations.RunPython(populate_offices, restore_location_names),
+        migrations.RemoveIndex(
+            model_name='archivedcomplaint',
+            name='archived_scope_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='complaint',
+            name='complaint_scope_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='complaint',
+            name='complaint_open_scope_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='complaint',
+            name='complaint_scope_updated_idx',
+        ),
+        migrations.RemoveField(
+            model_name='archivedcomplaint',
+            name='district',
+        ),
+        migrations.RemoveField(
+            model_name='archivedcomplaint',
+            name='office',
+        ),
+        migrations.RemoveField(
+            model_name='archivedcomplaint',
+            name='province',
+        ),
+        migrations.RemoveField(
+            model_name='complaint',
+            name='district',
+        ),
+        migrations.RemoveField(
+            model_name='complaint',
+            name='office',
+        ),
+        migrations.RemoveField(
+            model_name='complaint',
+            name='province',
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomplaint',
+            index=models.Index(fields=['location', '-created_at', '-id'], name='archived_office_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['location', '-created_at', '-id'], name='complaint_office_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('status__in', ('Pending', 'In Progress'))), fields=['location', '-created_at', '-id'], name='complaint_open_office_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['location', 'updated_at', 'id'], name='complaint_office_updated_idx'),
+        ),
+        migrations.RunPython(recreate_search_triggers, migrations.RunPython.noop),
+    ]
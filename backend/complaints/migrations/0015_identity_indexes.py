@@ -0,0 +1,79 @@
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+EMAIL_INDEX_SQL = "CREATE UNIQUE INDEX auth_user_email_lower_uniq ON auth_user (LOWER(email)) WHERE email > ''"
+EMAIL_INDEX_DROP_SQL = "DROP INDEX IF EXISTS auth_user_email_lower_uniq"
+
+
+def normalize_phone(value):
+    # Frozen copy of models.normalize_phone
+    value = (value or "").strip()
+    digits = re.sub(r"\D", "", value)
+    if not digits:
+        return None
+    return f"+{digits}" if value.startswith("+") else digits
+
+
+def normalize_identities(apps, schema_editor):
+    """Normalize stored phones, refusing to index emails and phones that are shared.
+
+    Nothing is changed while several accounts share an email (ignoring case)
+    or a phone: the migration stops and lists them, so an operator can decide
+    who keeps each one and then migrate again.
+    """
+    User = apps.get_model("auth", "User")
+    UserProfile = apps.get_model("complaints", "UserProfile")
+    db = schema_editor.connection.alias
+
+    by_email = {}
+    for user_id, username, email in User.objects.using(db).exclude(email="").order_by("id").values_list(
+        "id", "username", "email"
+    ):
+        by_email.setdefault(email.lower(), []).append(f"{user_id} ({username})")
+    by_phone = {}
+    phones = {}
+    for profile_id, user_id, username, phone in UserProfile.objects.using(db).exclude(phone=None).order_by(
+        "user_id"
+    ).values_list("id", "user_id", "user__username", "phone"):
+        normalized = normalize_phone(phone)
+        phones[profile_id] = (phone, normalized)
+        if normalized is not None:
+            by_phone.setdefault(normalized, []).append(f"{user_id} ({username})")
+
+    conflicts = [
+        f"  {kind} {value}: users {', '.join(users)}"
+        for kind, owners in (("email", by_email), ("phone", by_phone))
+        for value, users in owners.items()
+        if len(users) > 1
+    ]
+    if conflicts:
+        raise RuntimeError(
+            "Several accounts share these identities; give each to one account, then migrate again "
+            "(`manage.py resolve_duplicate_identities` does so by a fixed rule). "
+            "No account was changed.\n" + "\n".join(conflicts)
+        )
+
+    for profile_id, (phone, normalized) in phones.items():
+        if normalized != phone:
+            UserProfile.objects.using(db).filter(pk=profile_id).update(phone=normalized)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('complaints', '0014_userprofile_token_version'),
+    ]
+
+    operations = [
+        # Reformatting phones loses nothing a reverse would need to restore
+        migrations.RunPython(normalize_identities, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userprofile',
+            constraint=models.UniqueConstraint(fields=('phone',), name='userprofile_phone_unique'),
+        ),
+        # auth_user belongs to django.contrib.auth, so its index is plain SQL (SQLite and PostgreSQL alike)
+        migrations.RunSQL(EMAIL_INDEX_SQL, EMAIL_INDEX_DROP_SQL),
+    ]
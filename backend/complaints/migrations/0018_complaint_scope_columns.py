@@ -0,0 +1,68 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+LOCATED_MODELS = ("Complaint", "ArchivedComplaint")
+
+
+def copy_office_parents(apps, schema_editor):
+    """Fill the district and province ids from each row's office, one UPDATE per district."""
+    Office = apps.get_model("complaints", "Office")
+    db = schema_editor.connection.alias
+    offices_by_district = {}
+    for office_id, district_id, province_id in Office.objects.using(db).values_list(
+        "id", "district_id", "district__province_id"
+    ):
+        offices_by_district.setdefault((district_id, province_id), []).append(office_id)
+    for name in LOCATED_MODELS:
+        rows = apps.get_model("complaints", name).objects.using(db)
+        for (district_id, province_id), office_ids in offices_by_district.items():
+            rows.filter(location_id__in=office_ids).update(
+                location_district_id=district_id, location_province_id=province_id,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0017_complaint_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcomplaint',
+            name='location_district',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='complaints.district'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomplaint',
+            name='location_province',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='complaints.province'),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='location_district',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='complaints.district'),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='location_province',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='complaints.province'),
+        ),
+        migrations.RunPython(copy_office_parents, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='archivedcomplaint',
+            index=models.Index(fields=['location_district', '-created_at', '-id'], name='archived_district_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomplaint',
+            index=models.Index(fields=['location_province', '-created_at', '-id'], name='archived_province_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['location_district', '-created_at', '-id'], name='complaint_district_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['location_province', '-created_at', '-id'], name='complaint_province_created_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+import re
+
+from django.db import migrations
+
+
+def canonical_phone(value):
+    # Frozen copy of models.normalize_phone
+    return re.sub(r"\D", "", value or "") or None
+
+
+def drop_phone_plus(apps, schema_editor):
+    """Store phones as digits only, refusing to merge numbers that differed only by a ``+``.
+
+    Nothing is changed while "+977..." and "977..." belong to different
+    accounts: the migration stops and lists them, as 0015 does.
+    """
+    UserProfile = apps.get_model("complaints", "UserProfile")
+    db = schema_editor.connection.alias
+
+    owners = {}
+    changed = {}
+    for profile_id, user_id, username, phone in UserProfile.objects.using(db).exclude(phone=None).order_by(
+        "user_id"
+    ).values_list("id", "user_id", "user__username", "phone"):
+        canonical = canonical_phone(phone)
+        if canonical is not None:
+            owners.setdefault(canonical, []).append(f"{user_id} ({username})")
+        if canonical != phone:
+            changed[profile_id] = canonical
+
+    conflicts = [f"  phone {phone}: users {', '.join(users)}" for phone, users in owners.items() if len(users) > 1]
+    if conflicts:
+        raise RuntimeError(
+            "Several accounts share these phone numbers; give each to one account, then migrate again "
+            "(`manage.py resolve_duplicate_identities` does so by a fixed rule). "
+            "No account was changed.\n" + "\n".join(conflicts)
+        )
+
+    for profile_id, canonical in changed.items():
+        UserProfile.objects.using(db).filter(pk=profile_id).update(phone=canonical)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0018_complaint_scope_columns'),
+    ]
+
+    operations = [
+        # Digits-only numbers are valid under the previous rule too, so there is nothing to undo
+        migrations.RunPython(drop_phone_plus, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,19 @@
+import re
+
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+
+from .offices import directory
+
+
+def normalize_phone(value):
+    """Canonical form of a phone number, used both to store and to look up: digits only; None if blank.
+
+    A leading ``+`` is dropped rather than kept, so "+977 98..." and "97798..."
+    are the same number.
+    """
+    return re.sub(r"\D", "", value or "") or None
 
 
 class UserProfile(models.Model):
@@ -13,12 +27,152 @@ class UserProfile(models.Model):
     assigned_province = models.CharField(max_length=100, blank=True, null=True)
     assigned_district = models.CharField(max_length=100, blank=True, null=True)
     assigned_office = models.CharField(max_length=100, blank=True, null=True)
+    # Bumped whenever tokens must stop vouching for the claims above (see authentication.py)
+    token_version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Phones are stored normalized, so this is the login/reset lookup index
+            models.UniqueConstraint(fields=["phone"], name="userprofile_phone_unique"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.phone = normalize_phone(self.phone)
+        super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         return f"{self.user.email} - {self.phone or 'no phone'}"
 
 
-class Complaint(models.Model):
+OPEN_STATUSES = ("Pending", "In Progress")
+CLOSED_STATUSES = ("Resolved", "Rejected")
+
+# Status changes an admin may make; Rejected and Resolved are terminal
+STATUS_TRANSITIONS = {
+    "Pending": frozenset({"In Progress", "Rejected"}),
+    "In Progress": frozenset({"Resolved"}),
+    "Rejected": frozenset(),
+    "Resolved": frozenset(),
+}
+
+# Columns that identify a row in ComplaintStat
+STAT_KEY_FIELDS = ("province", "district", "office", "category", "status")
+# The complaint columns those are derived from
+STAT_KEY_SOURCE = ("location_id", "category", "status")
+LOCATION_NAMES = ("province", "district", "office")
+
+
+def stat_key_for(location_id, category, status):
+    """``ComplaintStat`` key for a complaint row given as ``STAT_KEY_SOURCE`` values."""
+    return (*directory.names(location_id), category, status)
+
+
+class Province(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class District(models.Model):
+    province = models.ForeignKey(Province, on_delete=models.PROTECT, related_name="districts")
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["province", "name"], name="district_name_unique"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.province} / {self.name}"
+
+
+class Office(models.Model):
+    district = models.ForeignKey(District, on_delete=models.PROTECT, related_name="offices")
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["district", "name"], name="office_name_unique"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.district} / {self.name}"
+
+
+class LocationScopedQuerySet(models.QuerySet):
+    def in_scope(self, province=None, district=None, office=None):
+        """Restrict to an admin's assigned location; unset levels match everything."""
+        filters = {}
+        if province:
+            filters["province"] = province
+        if district:
+            filters["district"] = district
+        if office:
+            filters["office"] = office
+        return self.filter(**filters) if filters else self
+
+
+# Column holding the province, district and office id of a complaint, by level
+SCOPE_COLUMNS = ("location_province_id", "location_district_id", "location_id")
+
+
+class ComplaintQuerySet(models.QuerySet):
+    def in_scope(self, province=None, district=None, office=None):
+        """Restrict to an admin's assigned location; unset levels match everything.
+
+        Filters on the narrowest assigned level's own column, so each level is
+        served by its own ``(column, -created_at, -id)`` index.
+        """
+        if not (province or district or office):
+            return self
+        level, ids = directory.scope_ids(province, district, office)
+        if len(ids) == 1:
+            return self.filter(**{SCOPE_COLUMNS[level]: ids[0]})
+        return self.filter(**{f"{SCOPE_COLUMNS[level]}__in": ids})
+
+    def newest_first(self):
+        return self.order_by("-created_at", "-id")
+
+
+def _location_name(level):
+    return property(
+        lambda self: self.location_names()[level],
+        lambda self, value: self.set_location_name(level, value),
+    )
+
+
+class OfficeLocationMixin:
+    """``province``/``district``/``office`` names for a row that stores only ``location_id``.
+
+    Reads go through the in-memory office directory and never query. Assigning
+    the names (as the serializer and older callers do) re-points ``location``;
+    an office the directory does not know yet is created on save.
+    """
+
+    province = _location_name(0)
+    district = _location_name(1)
+    office = _location_name(2)
+
+    def location_names(self):
+        if self.location_id is None:
+            return self.__dict__.get("_pending_location", (None, None, None))
+        return directory.names(self.location_id)
+
+    def set_location_name(self, level, value):
+        names = list(self.location_names())
+        names[level] = value or None
+        self.location_id = directory.office_id(*names)
+        self._pending_location = tuple(names)
+
+    def resolve_location(self, using=None):
+        pending = self.__dict__.get("_pending_location")
+        if self.location_id is None and pending and all(pending):
+            self.location_id = directory.ensure(*pending, using=using)
+        self.location_province_id, self.location_district_id = directory.parents(self.location_id)
+
+
+class Complaint(OfficeLocationMixin, models.Model):
     STATUS_CHOICES = [
         ("Pending", "Pending"),
         ("In Progress", "In Progress"),
@@ -30,13 +184,303 @@ class Complaint(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     category = models.CharField(max_length=100)
-    province = models.CharField(max_length=100, blank=True, null=True)
-    district = models.CharField(max_length=100, blank=True, null=True)
-    office = models.CharField(max_length=100, blank=True, null=True)
+    # The scope indexes below lead with this column, so no index of its own
+    location = models.ForeignKey(
+        Office, on_delete=models.PROTECT, related_name="+", blank=True, null=True, db_index=False,
+    )
+    # Copies of the office's parents, kept by save(), so district and province admins get their own indexes
+    location_district = models.ForeignKey(
+        District, on_delete=models.PROTECT, related_name="+", blank=True, null=True, db_index=False, editable=False,
+    )
+    location_province = models.ForeignKey(
+        Province, on_delete=models.PROTECT, related_name="+", blank=True, null=True, db_index=False, editable=False,
+    )
     remarks = models.TextField(blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Pending")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ComplaintQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Citizen listing: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+            models.Index(fields=["user", "-created_at", "-id"], name="complaint_user_created_idx"),
+            # Admin listing at each assigned level, newest first
+            models.Index(fields=["location", "-created_at", "-id"], name="complaint_office_created_idx"),
+            models.Index(fields=["location_district", "-created_at", "-id"], name="complaint_district_created_idx"),
+            models.Index(fields=["location_province", "-created_at", "-id"], name="complaint_province_created_idx"),
+            # Unscoped staff listing
+            models.Index(fields=["-created_at", "-id"], name="complaint_created_idx"),
+            # Triage queues only ever need the open rows
+            models.Index(
+                fields=["location", "-created_at", "-id"],
+                name="complaint_open_office_idx",
+                condition=models.Q(status__in=OPEN_STATUSES),
+            ),
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="complaint_open_user_idx",
+                condition=models.Q(status__in=OPEN_STATUSES),
+            ),
+            # Delta sync: rows changed after a (updated_at, id) cursor
+            models.Index(fields=["user", "updated_at", "id"], name="complaint_user_updated_idx"),
+            models.Index(fields=["location", "updated_at", "id"], name="complaint_office_updated_idx"),
+            # Archiving: closed rows oldest first
+            models.Index(
+                fields=["updated_at", "id"],
+                name="complaint_closed_updated_idx",
+                condition=models.Q(status__in=CLOSED_STATUSES),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember which ComplaintStat bucket the row was loaded from, and its remarks for history
+        loaded = instance.__dict__
+        if all(field in loaded for field in STAT_KEY_SOURCE):
+            instance._loaded_stat_key = stat_key_for(*(loaded[field] for field in STAT_KEY_SOURCE))
+        if "remarks" in loaded:
+            instance._loaded_remarks = loaded["remarks"]
+        return instance
+
+    def stat_key(self):
+        return tuple(getattr(self, field) for field in STAT_KEY_FIELDS)
+
+    def save(self, *args, **kwargs):
+        # Keep the row, any new office and its ComplaintStat counters in one transaction
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"location", "location_id"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "location_district", "location_province"}
+        with transaction.atomic(using=kwargs.get("using")):
+            self.resolve_location(using=kwargs.get("using"))
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            return super().delete(*args, **kwargs)
+
     def __str__(self) -> str:
         return f"{self.title} - {self.status}"
+
+
+class ArchivedComplaint(OfficeLocationMixin, models.Model):
+    """A closed complaint moved out of the hot table by ``archive_complaints``.
+
+    Same columns and ids as ``Complaint``, so serializers and clients cannot
+    tell the two apart. Rows are never edited once archived.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_complaints")
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    category = models.CharField(max_length=100)
+    location = models.ForeignKey(
+        Office, on_delete=models.PROTECT, related_name="+", blank=True, null=True, db_index=False,
+    )
+    # Copies of the office's parents, kept by save(), so district and province admins get their own indexes
+    location_district = models.ForeignKey(
+        District, on_delete=models.PROTECT, related_name="+", blank=True, null=True, db_index=False, editable=False,
+    )
+    location_province = models.ForeignKey(
+        Province, on_delete=models.PROTECT, related_name="+", blank=True, null=True, db_index=False, editable=False,
+    )
+    remarks = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=Complaint.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    objects = ComplaintQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-id"], name="archived_user_created_idx"),
+            models.Index(fields=["location", "-created_at", "-id"], name="archived_office_created_idx"),
+            models.Index(fields=["location_district", "-created_at", "-id"], name="archived_district_created_idx"),
+            models.Index(fields=["location_province", "-created_at", "-id"], name="archived_province_created_idx"),
+        ]
+
+    @classmethod
+    def from_complaint(cls, complaint):
+        return cls(**{field.attname: getattr(complaint, field.attname) for field in Complaint._meta.concrete_fields})
+
+    def stat_key(self):
+        return tuple(getattr(self, field) for field in STAT_KEY_FIELDS)
+
+    def __str__(self) -> str:
+        return f"{self.title} - {self.status} (archived)"
+
+
+class ComplaintTombstone(models.Model):
+    """Marker left behind when a complaint is deleted, so sync clients can drop it."""
+
+    complaint_id = models.BigIntegerField()
+    # Plain ids rather than FKs: tombstones outlive the rows they describe
+    user_id = models.IntegerField()
+    province = models.CharField(max_length=100, blank=True, null=True)
+    district = models.CharField(max_length=100, blank=True, null=True)
+    office = models.CharField(max_length=100, blank=True, null=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    objects = LocationScopedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user_id", "id"], name="tombstone_user_idx"),
+            models.Index(fields=["province", "district", "office", "id"], name="tombstone_scope_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Deleted complaint {self.complaint_id}"
+
+
+class ComplaintStatusChange(models.Model):
+    """One status/remarks change, appended in the same transaction as the change.
+
+    Insert-only and deliberately narrow: plain ids instead of FKs (so history
+    survives deletes and inserts skip constraint checks) and just the two
+    indexes the timeline and activity feed read.
+    """
+
+    complaint_id = models.BigIntegerField()
+    actor_id = models.IntegerField(blank=True, null=True)
+    from_status = models.CharField(max_length=20, choices=Complaint.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Complaint.STATUS_CHOICES)
+    remarks = models.TextField(blank=True, null=True)
+    province = models.CharField(max_length=100, blank=True, null=True)
+    district = models.CharField(max_length=100, blank=True, null=True)
+    office = models.CharField(max_length=100, blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = LocationScopedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["complaint_id", "created_at"], name="status_change_timeline_idx"),
+            models.Index(fields=["province", "district", "office", "-id"], name="status_change_scope_idx"),
+        ]
+
+    @classmethod
+    def for_complaint(cls, complaint, from_status, actor_id=None):
+        """Unsaved history row for ``complaint``'s current status and remarks."""
+        return cls(
+            complaint_id=complaint.pk,
+            actor_id=actor_id,
+            from_status=from_status,
+            to_status=complaint.status,
+            remarks=complaint.remarks,
+            province=complaint.province,
+            district=complaint.district,
+            office=complaint.office,
+            created_at=complaint.updated_at or timezone.now(),
+        )
+
+    def __str__(self) -> str:
+        return f"#{self.complaint_id}: {self.from_status} -> {self.to_status}"
+
+
+class ComplaintStat(models.Model):
+    """Running complaint count per location, category and status.
+
+    Maintained on every create, update and delete so dashboards read a handful
+    of rows instead of grouping the complaint table. Blank locations are stored
+    as empty strings so the unique constraint holds.
+    """
+
+    province = models.CharField(max_length=100, blank=True, default="")
+    district = models.CharField(max_length=100, blank=True, default="")
+    office = models.CharField(max_length=100, blank=True, default="")
+    category = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=Complaint.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    objects = LocationScopedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=STAT_KEY_FIELDS, name="complaint_stat_key_unique"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.office} / {self.category} / {self.status}: {self.count}"
+
+
+class ComplaintEvent(models.Model):
+    """Outbox of change events read by every worker's SSE poller (see events.DatabaseBroker)."""
+
+    kind = models.CharField(max_length=40)
+    complaint_id = models.BigIntegerField()
+    user_id = models.IntegerField()
+    province = models.CharField(max_length=100, blank=True, null=True)
+    district = models.CharField(max_length=100, blank=True, null=True)
+    office = models.CharField(max_length=100, blank=True, null=True)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.kind} #{self.complaint_id}"
+
+
+class OutboundMessage(models.Model):
+    """Email/SMS outbox, written with the request and delivered by ``manage.py process_outbox``."""
+
+    EMAIL = "email"
+    SMS = "sms"
+    CHANNEL_CHOICES = [(EMAIL, "Email"), (SMS, "SMS")]
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (SENT, "Sent"), (FAILED, "Failed")]
+
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    recipient = models.CharField(max_length=254)
+    subject = models.CharField(max_length=255, blank=True, default="")
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Due time while pending; a claimed message is pushed forward by the worker's lease
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # The worker's claim query: due pending messages, oldest first
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                name="outbox_due_idx",
+                condition=models.Q(status="pending"),
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.channel} to {self.recipient} ({self.status})"
+
+
+class ComplaintNotification(models.Model):
+    """A status/remarks change waiting for its citizen's next digest email.
+
+    Written in the same transaction as the change and deleted once the digest
+    is queued (see ``notifications.py``); plain ids, like the history table.
+    """
+
+    user_id = models.IntegerField()
+    complaint_id = models.BigIntegerField()
+    status = models.CharField(max_length=20, choices=Complaint.STATUS_CHOICES)
+    remarks = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Which citizens have a change older than the digest window
+            models.Index(fields=["created_at"], name="notification_due_idx"),
+            models.Index(fields=["user_id", "id"], name="notification_user_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Complaint #{self.complaint_id} -> {self.status} for user {self.user_id}"
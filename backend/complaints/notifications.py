@@ -0,0 +1,96 @@
+"""Digest emails telling citizens their complaints changed.
+
+Admin status/remarks changes (PATCH, PUT and bulk updates) call
+``notify_citizens``, which inserts one ``ComplaintNotification`` per changed
+complaint in the change's own transaction. Nothing is sent from the request.
+
+The outbox worker calls ``queue_digests`` on every pass. Once a citizen's
+oldest pending notification is ``NOTIFICATION_DIGEST_SECONDS`` old, all of
+their pending notifications are folded into one email, queued in the outbox
+and deleted, in a single transaction. A bulk triage touching 1,000 complaints
+therefore sends one email per affected citizen, listing the latest state of
+each of their complaints.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import Complaint, ComplaintNotification
+from .outbox import enqueue_email
+
+
+def notify_citizens(complaints, using=None):
+    """Queue a notification for each complaint's owner about its current status and remarks."""
+    ComplaintNotification.objects.using(using).bulk_create(
+        [
+            ComplaintNotification(
+                user_id=complaint.user_id,
+                complaint_id=complaint.pk,
+                status=complaint.status,
+                remarks=complaint.remarks,
+                created_at=complaint.updated_at or timezone.now(),
+            )
+            for complaint in complaints
+        ]
+    )
+
+
+def digest_email(notifications, titles):
+    """``(subject, body)`` for one citizen's notifications, oldest first."""
+    latest = {}
+    for notification in notifications:
+        # Several changes to one complaint in a window: only its final state matters
+        latest.pop(notification.complaint_id, None)
+        latest[notification.complaint_id] = notification
+    lines = []
+    for complaint_id, notification in latest.items():
+        title = titles.get(complaint_id, f"Complaint #{complaint_id}")
+        lines.append(f"- {title} (#{complaint_id}): {notification.status}")
+        if notification.remarks:
+            lines.append(f"  Remarks: {notification.remarks}")
+    if len(latest) == 1:
+        (complaint_id,) = latest
+        subject = f"Update on your complaint: {titles.get(complaint_id, f'#{complaint_id}')}"
+    else:
+        subject = f"Updates on {len(latest)} of your complaints"
+    body = "There are updates on your complaints:\n\n" + "\n".join(lines) + "\n"
+    return subject, body
+
+
+def queue_digests(batch_size, using="default"):
+    """Queue digest emails for up to ``batch_size`` citizens whose window has closed; returns how many."""
+    cutoff = timezone.now() - timedelta(seconds=settings.NOTIFICATION_DIGEST_SECONDS)
+    pending = ComplaintNotification.objects.using(using)
+    with transaction.atomic(using=using):
+        user_ids = list(
+            pending.filter(created_at__lte=cutoff).order_by().values_list("user_id", flat=True).distinct()[:batch_size]
+        )
+        if not user_ids:
+            return 0
+        rows = pending.filter(user_id__in=user_ids).order_by("id")
+        if connections[using].features.has_select_for_update_skip_locked:
+            # Another worker already digesting these citizens keeps them
+            rows = rows.select_for_update(skip_locked=True)
+        by_user = defaultdict(list)
+        for notification in rows:
+            by_user[notification.user_id].append(notification)
+        if not by_user:
+            return 0
+
+        complaint_ids = {n.complaint_id for notifications in by_user.values() for n in notifications}
+        titles = dict(Complaint.objects.using(using).filter(pk__in=complaint_ids).values_list("id", "title"))
+        emails = dict(User.objects.using(using).filter(pk__in=list(by_user), email__gt="").values_list("id", "email"))
+        queued = 0
+        for user_id, notifications in by_user.items():
+            # Citizens without an email address have nowhere to receive a digest
+            if user_id in emails:
+                subject, body = digest_email(notifications, titles)
+                enqueue_email(emails[user_id], subject, body, using=using)
+                queued += 1
+        pending.filter(pk__in=[n.pk for notifications in by_user.values() for n in notifications]).delete()
+    return queued
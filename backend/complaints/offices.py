@@ -0,0 +1,110 @@
+"""In-memory directory of the Province -> District -> Office tables.
+
+Complaints store an integer ``location_id`` plus copies of its district and
+province ids. The directory maps ids to ``(province, district, office)`` names
+and back, and turns an admin's assigned names into the ids to filter on at the
+narrowest assigned level, without touching the database.
+The hierarchy is small (a few hundred offices), so each process loads all of
+it at once and reloads after ``OFFICE_DIRECTORY_TTL`` seconds or when it meets
+an id it does not know.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+NO_LOCATION = (None, None, None)
+NO_PARENTS = (None, None)
+
+
+class OfficeDirectory:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._names = {}
+        self._ids = {}
+        self._parents = {}
+        self._scopes = {}
+
+    def load(self):
+        from .models import Office
+
+        rows = Office.objects.values_list(
+            "id", "district__province__name", "district__name", "name", "district__province_id", "district_id",
+        )
+        names, parents = {}, {}
+        for office_id, province, district, office, province_id, district_id in rows:
+            names[office_id] = (province, district, office)
+            parents[office_id] = (province_id, district_id)
+        with self._lock:
+            self._names = names
+            self._ids = {triple: office_id for office_id, triple in names.items()}
+            self._parents = parents
+            self._scopes = {}
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Reload on next use (called when the hierarchy tables change)."""
+        self._loaded_at = None
+
+    def refresh_if_stale(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > settings.OFFICE_DIRECTORY_TTL:
+            self.load()
+
+    def names(self, office_id):
+        """``(province, district, office)`` for ``office_id``; all None for no location."""
+        if office_id is None:
+            return NO_LOCATION
+        self.refresh_if_stale()
+        if office_id not in self._names:
+            # Created by another process since we loaded
+            self.load()
+        return self._names.get(office_id, NO_LOCATION)
+
+    def parents(self, office_id):
+        """``(province_id, district_id)`` for ``office_id``; both None for no location."""
+        if office_id is None:
+            return NO_PARENTS
+        self.refresh_if_stale()
+        if office_id not in self._parents:
+            self.load()
+        return self._parents.get(office_id, NO_PARENTS)
+
+    def office_id(self, province, district, office):
+        """Id of the office with these names, or None if it is not in the directory."""
+        self.refresh_if_stale()
+        return self._ids.get((province, district, office))
+
+    def scope_ids(self, province=None, district=None, office=None):
+        """``(level, ids)`` for the narrowest set level: 0 province ids, 1 district ids, 2 office ids.
+
+        Unset levels match everything, so a district assigned without its
+        province still covers every district of that name.
+        """
+        self.refresh_if_stale()
+        key = (province or None, district or None, office or None)
+        scopes = self._scopes
+        if key not in scopes:
+            level = 2 if key[2] else 1 if key[1] else 0
+            scopes[key] = (level, tuple(sorted({
+                (*self._parents[office_id], office_id)[level]
+                for office_id, triple in self._names.items()
+                if all(wanted is None or wanted == name for wanted, name in zip(key, triple))
+            })))
+        return scopes[key]
+
+    def ensure(self, province, district, office, using=None):
+        """Id of the office with these names, creating the hierarchy rows if needed."""
+        from .models import District, Office, Province
+
+        with transaction.atomic(using=using):
+            province_row, _ = Province.objects.using(using).get_or_create(name=province)
+            district_row, _ = District.objects.using(using).get_or_create(province=province_row, name=district)
+            office_row, _ = Office.objects.using(using).get_or_create(district=district_row, name=office)
+        # Not cached here: the transaction may still roll back. names() reloads on a miss.
+        return office_row.pk
+
+
+directory = OfficeDirectory()
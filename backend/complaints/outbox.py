@@ -0,0 +1,143 @@
+"""Transactional outbox for email and SMS.
+
+Request handlers call ``enqueue_email``/``enqueue_sms``, which only insert an
+``OutboundMessage`` row in the caller's transaction, so a slow mail or SMS
+provider never holds up a request. ``manage.py process_outbox`` delivers
+them:
+
+* ``claim_batch`` locks due messages with ``SELECT ... FOR UPDATE SKIP
+  LOCKED`` (so concurrent workers take disjoint batches), pushes their due
+  time forward by ``OUTBOX_LEASE_SECONDS`` and commits. Delivery happens
+  outside any transaction; a worker that dies mid-batch leaves its messages
+  to be claimed again when the lease runs out.
+* ``deliver_batch`` sends all of a batch's emails over one SMTP connection
+  and its SMS through the configured gateway (see ``sms.py``). Failures are
+  retried with exponential backoff up to ``OUTBOX_MAX_ATTEMPTS`` times.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import OutboundMessage
+from .sms import get_gateway
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(recipient, subject, body, using=None):
+    return OutboundMessage.objects.using(using).create(
+        channel=OutboundMessage.EMAIL, recipient=recipient, subject=subject, body=body,
+    )
+
+
+def enqueue_sms(recipient, body, using=None):
+    return OutboundMessage.objects.using(using).create(channel=OutboundMessage.SMS, recipient=recipient, body=body)
+
+
+def claim_batch(batch_size, using="default"):
+    """Lease up to ``batch_size`` due messages to this worker and return them."""
+    now = timezone.now()
+    with transaction.atomic(using=using):
+        due = (
+            OutboundMessage.objects.using(using)
+            .filter(status=OutboundMessage.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")
+        )
+        if connections[using].features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        messages = list(due[:batch_size])
+        if messages:
+            OutboundMessage.objects.using(using).filter(pk__in=[message.pk for message in messages]).update(
+                next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+            )
+    return messages
+
+
+def retry_delay(attempts):
+    """Backoff before attempt ``attempts + 1``: doubling from the base delay, capped."""
+    return min(settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.OUTBOX_RETRY_MAX_SECONDS)
+
+
+def _record(message, error, using):
+    message.attempts += 1
+    now = timezone.now()
+    if error is None:
+        message.status, message.sent_at, message.last_error = OutboundMessage.SENT, now, ""
+    else:
+        message.last_error = f"{type(error).__name__}: {error}"
+        if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            message.status = OutboundMessage.FAILED
+            logger.error("Giving up on outbound %s %s: %s", message.channel, message.pk, message.last_error)
+        else:
+            message.next_attempt_at = now + timedelta(seconds=retry_delay(message.attempts))
+    message.save(using=using, update_fields=["status", "attempts", "next_attempt_at", "last_error", "sent_at"])
+
+
+def _send_emails(messages):
+    """Yield ``(message, error)`` for each email, all sent over one SMTP connection."""
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        for message in messages:
+            yield message, exc
+        return
+    try:
+        for message in messages:
+            email = EmailMessage(
+                message.subject, message.body, settings.DEFAULT_FROM_EMAIL, [message.recipient], connection=connection,
+            )
+            try:
+                email.send()
+            except Exception as exc:
+                yield message, exc
+            else:
+                yield message, None
+    finally:
+        connection.close()
+
+
+def _send_sms(messages, gateway):
+    for message in messages:
+        try:
+            gateway.send(message.recipient, message.body)
+        except Exception as exc:
+            yield message, exc
+        else:
+            yield message, None
+
+
+def deliver_batch(messages, gateway=None, using="default"):
+    """Send a claimed batch and record each outcome; returns ``(sent, failed)`` counts."""
+    emails = [message for message in messages if message.channel == OutboundMessage.EMAIL]
+    texts = [message for message in messages if message.channel == OutboundMessage.SMS]
+    sent = failed = 0
+    outcomes = []
+    if emails:
+        outcomes.extend(_send_emails(emails))
+    if texts:
+        outcomes.extend(_send_sms(texts, gateway or get_gateway()))
+    for message, error in outcomes:
+        _record(message, error, using)
+        if error is None:
+            sent += 1
+        else:
+            failed += 1
+    return sent, failed
+
+
+def process_outbox(batch_size, gateway=None, using="default"):
+    """Deliver every due message, one claimed batch at a time; returns ``(sent, failed)``."""
+    sent = failed = 0
+    while True:
+        messages = claim_batch(batch_size, using=using)
+        if not messages:
+            return sent, failed
+        batch_sent, batch_failed = deliver_batch(messages, gateway=gateway, using=using)
+        sent += batch_sent
+        failed += batch_failed
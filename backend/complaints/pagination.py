@@ -0,0 +1,51 @@
+"""Pagination for complaint listings: keyset for browsing, page numbers for search."""
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ComplaintCursorPagination(CursorPagination):
+    """Newest-first cursor pagination over ``(-created_at, -id)``.
+
+    The cursor is opaque to clients and stays stable while new complaints are
+    filed, so page cost does not grow with the size of the table. Full-text
+    searches (``?q=``) use ``ComplaintSearchPagination`` instead.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = settings.COMPLAINT_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.COMPLAINT_MAX_PAGE_SIZE
+
+
+class ComplaintSearchPagination(PageNumberPagination):
+    """Page-numbered search results, best match first, ties broken by id.
+
+    A cursor needs a unique, exactly comparable position, which a float rank
+    is not (ties are common, and the ``icontains`` fallback ranks every row the
+    same), so search results are paged by offset over ``(-search_rank, -id)``.
+    Search result sets are small and bounded by the query.
+    """
+
+    page_size = settings.COMPLAINT_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.COMPLAINT_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return super().paginate_queryset(queryset.order_by("-search_rank", "-id"), request, view=view)
+
+
+def complaint_paginator(params):
+    """The paginator for a complaint list request with query string ``params``."""
+    if params.get("q", "").strip():
+        return ComplaintSearchPagination()
+    return ComplaintCursorPagination()
+
+
+class StatusChangePagination(CursorPagination):
+    """Newest-first cursor pagination over status history ids (the activity feed)."""
+
+    ordering = "-id"
+    page_size = settings.COMPLAINT_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.COMPLAINT_MAX_PAGE_SIZE
@@ -0,0 +1,42 @@
+"""Role helpers shared by the complaint views and serializers."""
+
+from .models import UserProfile
+
+_PROFILE_ATTR = "_complaints_profile"
+
+
+def get_profile(request):
+    """Return the caller's ``UserProfile`` (or None), resolved once per request."""
+    if not hasattr(request, _PROFILE_ATTR):
+        profile = None
+        if request.user.is_authenticated:
+            profile = UserProfile.objects.filter(user_id=request.user.pk).first()
+        setattr(request, _PROFILE_ATTR, profile)
+    return getattr(request, _PROFILE_ATTR)
+
+
+def is_admin(request) -> bool:
+    if request.user.is_staff:
+        return True
+    return getattr(get_profile(request), "role", "user") == "admin"
+
+
+def scope_queryset(request, queryset):
+    """Limit ``queryset`` to what the caller may see.
+
+    Admins see their assigned province/district/office (any level left blank
+    matches everything); everyone else sees only their own rows. Works for any
+    model with a ``user_id`` column and an ``in_scope`` queryset method:
+    complaints filter on the office ids under the assignment, the log tables
+    on their name columns.
+    """
+    if is_admin(request):
+        profile = get_profile(request)
+        if profile:
+            queryset = queryset.in_scope(
+                profile.assigned_province,
+                profile.assigned_district,
+                profile.assigned_office,
+            )
+        return queryset
+    return queryset.filter(user_id=request.user.pk)
@@ -0,0 +1,130 @@
+"""Shared-cache copies of complaint list and ``me/`` responses.
+
+List pages are cached per *scope* rather than per user: every admin assigned
+to the same area shares one copy, and each citizen has their own. Each scope
+has a version marker in the cache. A write replaces the marker of every scope
+that can see the changed complaint (immediately and again once the transaction
+commits), so stale pages are never looked up again and simply expire.
+
+``me/`` payloads are cached per user and dropped when the user or their
+profile is saved. ``bootstrap/`` payloads are cached per user under their
+ETag, which changes with everything in them, so they need no invalidation.
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .permissions import get_profile, is_admin
+
+LIST_PREFIX = "complaints:list"
+VERSION_PREFIX = "complaints:version"
+ME_PREFIX = "complaints:me"
+BOOTSTRAP_PREFIX = "complaints:bootstrap"
+SCOPE_FIELDS = ("province", "district", "office")
+
+
+def enabled():
+    return settings.RESPONSE_CACHE_SECONDS > 0
+
+
+def request_scope(request):
+    """The caller's list scope (matching ``permissions.scope_queryset``), or None if uncacheable."""
+    if not is_admin(request):
+        return f"user:{request.user.pk}"
+    profile = get_profile(request)
+    levels = [getattr(profile, f"assigned_{field}", None) or "" for field in SCOPE_FIELDS]
+    # Only province > district > office prefixes are cached, so a write expires at most five scopes
+    if "" in levels and any(levels[levels.index(""):]):
+        return None
+    return "area:" + "|".join(levels)
+
+
+def complaint_scopes(user_id, province, district, office):
+    """Every cacheable list scope that can contain a complaint with these columns."""
+    levels = [province or "", district or "", office or ""]
+    return {f"user:{user_id}"} | {"area:" + "|".join(levels[:depth] + [""] * (3 - depth)) for depth in range(4)}
+
+
+def _scope_digest(scope):
+    # Scopes carry office names (spaces, "|"), which memcached rejects in keys
+    return hashlib.sha256(scope.encode()).hexdigest()[:32]
+
+
+def _version_key(scope):
+    return f"{VERSION_PREFIX}:{_scope_digest(scope)}"
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _list_key(request, scope, version):
+    # Pagination links are absolute, so the host is part of the key
+    digest = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()
+    return f"{LIST_PREFIX}:{_scope_digest(scope)}:{version}:{digest}"
+
+
+def list_cache_key(request):
+    """Cache key for this list request, or None when it must not be cached."""
+    scope = request_scope(request) if enabled() else None
+    if scope is None:
+        return None
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        # Evicted or never written: start a new version so no older copy can match
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return _list_key(request, scope, version)
+
+
+async def alist_cache_key(request):
+    scope = request_scope(request) if enabled() else None
+    if scope is None:
+        return None
+    key = _version_key(scope)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _new_version(), None)
+        version = await cache.aget(key)
+    return _list_key(request, scope, version)
+
+
+def _now_and_on_commit(expire, using):
+    # Again after commit: a reader that cached pre-commit rows in between used a version now retired
+    expire()
+    transaction.on_commit(expire, using=using)
+
+
+def invalidate_complaints(rows, using=None):
+    """Expire cached lists for complaints given as ``(user_id, province, district, office)`` rows."""
+    if not enabled():
+        return
+    scopes = set()
+    for row in rows:
+        scopes |= complaint_scopes(*row)
+    if scopes:
+        _now_and_on_commit(lambda: cache.set_many({_version_key(scope): _new_version() for scope in scopes}, None), using)
+
+
+def complaint_row(complaint):
+    return (complaint.user_id, complaint.province, complaint.district, complaint.office)
+
+
+def me_cache_key(user_id):
+    return f"{ME_PREFIX}:{user_id}"
+
+
+def invalidate_me(user_id, using=None):
+    if not enabled():
+        return
+    _now_and_on_commit(lambda: cache.delete(me_cache_key(user_id)), using)
+
+
+def bootstrap_cache_key(user_id, etag):
+    digest = etag.strip('"')
+    return f"{BOOTSTRAP_PREFIX}:{user_id}:{digest}"
@@ -0,0 +1,71 @@
+"""Ranked full-text search over complaint titles and descriptions.
+
+PostgreSQL uses a GIN index on a ``tsvector`` expression, SQLite uses an FTS5
+external-content table kept in sync by triggers. Both are created by migration
+``0006_complaint_search`` and maintained by the database itself, so rows written
+through ``save()``, ``bulk_update()`` or raw ``UPDATE`` are always searchable.
+Other backends (or SQLite builds without FTS5) fall back to ``icontains``.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+TABLE = "complaints_complaint"
+FTS_TABLE = "complaints_complaint_fts"
+
+# Must match the index expression in migration 0006 exactly for the planner to use it.
+PG_DOCUMENT = (
+    "to_tsvector('simple'::regconfig, "
+    "COALESCE(\"complaints_complaint\".\"title\", '') || ' ' || "
+    "COALESCE(\"complaints_complaint\".\"description\", ''))"
+)
+PG_QUERY = "websearch_to_tsquery('simple'::regconfig, %s)"
+
+_fts_available = {}
+
+
+def sqlite_has_fts(connection) -> bool:
+    """Whether migration 0006 managed to create the FTS5 table (cached per alias)."""
+    if connection.alias not in _fts_available:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _fts_available[connection.alias] = cursor.fetchone() is not None
+    return _fts_available[connection.alias]
+
+
+def _fts5_query(query: str) -> str:
+    """Quote each word so user input can never be parsed as FTS5 syntax."""
+    return " ".join(f'"{term}"' for term in re.findall(r"\w+", query))
+
+
+def search_complaints(queryset, query: str):
+    """Filter ``queryset`` to matches for ``query`` annotated with ``search_rank`` (higher is better)."""
+    connection = connections[queryset.db]
+    # The search index only covers the hot table; archived rows fall back to icontains
+    indexed = queryset.model._meta.db_table == TABLE
+
+    if indexed and connection.vendor == "postgresql":
+        rank = RawSQL(f"ts_rank({PG_DOCUMENT}, {PG_QUERY})", (query,), output_field=FloatField())
+        matches = RawSQL(f"{PG_DOCUMENT} @@ {PG_QUERY}", (query,), output_field=BooleanField())
+        return queryset.filter(matches).annotate(search_rank=rank)
+
+    if indexed and connection.vendor == "sqlite" and sqlite_has_fts(connection):
+        match = _fts5_query(query)
+        if not match:
+            return queryset.none()
+        # bm25() is lower-is-better, so negate it to share the PostgreSQL ordering.
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {TABLE}.id",
+            (match,),
+            output_field=FloatField(),
+        )
+        ids = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+        return queryset.filter(id__in=ids).annotate(search_rank=rank)
+
+    return queryset.filter(
+        Q(title__icontains=query) | Q(description__icontains=query)
+    ).annotate(search_rank=Value(1.0, output_field=FloatField()))
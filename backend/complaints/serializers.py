@@ -1,6 +1,9 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from .models import Complaint, UserProfile
+from .backends import users_by_email
+from .models import Complaint, ComplaintStatusChange, UserProfile, normalize_phone
+from .permissions import is_admin
+from .transitions import transition_error
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -38,8 +41,12 @@ class UserSerializer(serializers.ModelSerializer):
         
         # Check if email already exists
         email = data.get('email')
-        if email and User.objects.filter(email=email).exists():
+        if email and users_by_email(email).exists():
             raise serializers.ValidationError({"email": "Email already registered"})
+
+        phone = normalize_phone(data.get('phone'))
+        if phone and UserProfile.objects.filter(phone=phone).exists():
+            raise serializers.ValidationError({"phone": "Phone already registered"})
         
         return data
 
@@ -87,7 +94,7 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class ComplaintSerializer(serializers.ModelSerializer):
-    user = serializers.StringRelatedField(read_only=True)
+    user = serializers.CharField(source="user.username", read_only=True)
     province = serializers.CharField(required=True)
     district = serializers.CharField(required=True)
     office = serializers.CharField(required=True)
@@ -139,25 +146,53 @@ class ComplaintSerializer(serializers.ModelSerializer):
             instance = getattr(self, "instance", None)
             new_status = attrs["status"]
             if instance:
-                current_status = instance.status
-                allowed_map = {
-                    "Pending": {"In Progress", "Rejected"},
-                    "In Progress": {"Resolved"},
-                    "Rejected": set(),
-                    "Resolved": set(),
-                }
-                if new_status != current_status:
-                    if new_status not in allowed_map.get(current_status, set()):
-                        raise serializers.ValidationError({
-                            "status": f"Cannot change {current_status} to {new_status}"
-                        })
+                error = transition_error(instance.status, new_status)
+                if error:
+                    raise serializers.ValidationError({"status": error})
 
         # Only admins can edit status or remarks via API
         if request and request.method in ["PUT", "PATCH"]:
             if any(field in attrs for field in ["status", "remarks"]):
-                user = request.user
-                role = getattr(getattr(user, "profile", None), "role", "user")
-                if not (user.is_staff or role == "admin"):
+                if not is_admin(request):
                     raise serializers.ValidationError({"detail": "Admin only"})
 
         return attrs
+
+
+class ComplaintBulkUpdateItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Complaint.STATUS_CHOICES, required=False)
+    remarks = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    def validate(self, attrs):
+        extra_fields = set(self.initial_data) - {"id", "status", "remarks"}
+        if extra_fields:
+            raise serializers.ValidationError({"detail": "Only status and remarks can be updated"})
+        if "status" not in attrs and "remarks" not in attrs:
+            raise serializers.ValidationError({"detail": "Nothing to update"})
+        return attrs
+
+
+class ComplaintStatusChangeSerializer(serializers.ModelSerializer):
+    complaint = serializers.IntegerField(source="complaint_id", read_only=True)
+    actor = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ComplaintStatusChange
+        fields = [
+            "id",
+            "complaint",
+            "actor",
+            "from_status",
+            "to_status",
+            "remarks",
+            "province",
+            "district",
+            "office",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+    def get_actor(self, obj):
+        # History rows keep a bare actor_id; the view resolves usernames in one query
+        return self.context.get("actor_names", {}).get(obj.actor_id)
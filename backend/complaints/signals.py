@@ -0,0 +1,139 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import response_cache, stats
+from .authentication import PROFILE_CLAIM_FIELDS, USER_CLAIM_FIELDS, forget_token_version, revoke_tokens
+from .events import COMPLAINT_CREATED, COMPLAINT_STATUS_CHANGED, publish_complaint_event
+from .models import (
+    LOCATION_NAMES,
+    STAT_KEY_FIELDS,
+    STAT_KEY_SOURCE,
+    ArchivedComplaint,
+    Complaint,
+    ComplaintStatusChange,
+    ComplaintTombstone,
+    District,
+    Office,
+    Province,
+    UserProfile,
+    stat_key_for,
+)
+from .offices import directory as office_directory
+
+
+@receiver(pre_save, sender=Complaint)
+def remember_stat_key(sender, instance, raw=False, using=None, **kwargs):
+    # Rows built by hand (not loaded through from_db) need their old bucket and remarks looked up
+    if raw or instance._state.adding or (hasattr(instance, "_loaded_stat_key") and hasattr(instance, "_loaded_remarks")):
+        return
+    row = Complaint.objects.using(using).filter(pk=instance.pk).values_list(*STAT_KEY_SOURCE, "remarks").first()
+    instance._loaded_stat_key = stat_key_for(*row[:-1]) if row else None
+    instance._loaded_remarks = row[-1] if row else None
+
+
+@receiver(post_save, sender=Complaint)
+def update_stats(sender, instance, created, raw=False, using=None, update_fields=None, **kwargs):
+    if raw:
+        return
+    old_key = None if created else instance._loaded_stat_key
+    new_key = instance.stat_key()
+    old_remarks = getattr(instance, "_loaded_remarks", None)
+    new_remarks = instance.remarks
+    if old_key is not None and update_fields is not None:
+        # The three names all come from the location column
+        saved = set(update_fields)
+        if saved & {"location", "location_id"}:
+            saved.update(LOCATION_NAMES)
+        new_key = tuple(
+            new if field in saved else old
+            for field, old, new in zip(STAT_KEY_FIELDS, old_key, new_key)
+        )
+        if "remarks" not in saved:
+            new_remarks = old_remarks
+    stats.move(old_key, new_key, using=using)
+    instance._loaded_stat_key = new_key
+    instance._loaded_remarks = new_remarks
+    rows = {response_cache.complaint_row(instance)}
+    if old_key is not None:
+        # A moved complaint leaves its old area's lists as well
+        rows.add((instance.user_id, *old_key[:3]))
+    response_cache.invalidate_complaints(rows, using=using)
+
+    # status is the last field of the stat key
+    if created:
+        publish_complaint_event(COMPLAINT_CREATED, instance, using=using)
+    elif old_key is not None:
+        if old_key[-1] != new_key[-1]:
+            publish_complaint_event(COMPLAINT_STATUS_CHANGED, instance, previous_status=old_key[-1], using=using)
+        if (old_key[-1], old_remarks) != (new_key[-1], new_remarks):
+            # Full saves (PUT, Django admin), under the same rule as PATCH and bulk updates,
+            # which write their own history; the PUT view sets _history_actor_id
+            ComplaintStatusChange.for_complaint(
+                instance, old_key[-1], getattr(instance, "_history_actor_id", None)
+            ).save(using=using)
+
+
+@receiver(post_delete, sender=Complaint)
+def record_tombstone(sender, instance, using=None, **kwargs):
+    stats.move(getattr(instance, "_loaded_stat_key", instance.stat_key()), None, using=using)
+    response_cache.invalidate_complaints([response_cache.complaint_row(instance)], using=using)
+    ComplaintTombstone.objects.using(using).create(
+        complaint_id=instance.pk,
+        user_id=instance.user_id,
+        province=instance.province,
+        district=instance.district,
+        office=instance.office,
+    )
+
+
+@receiver(post_delete, sender=ArchivedComplaint)
+def drop_archived_stats(sender, instance, using=None, **kwargs):
+    # Archived complaints still count; only an actual delete (e.g. of the user) removes them
+    stats.move(instance.stat_key(), None, using=using)
+    response_cache.invalidate_complaints([response_cache.complaint_row(instance)], using=using)
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def revoke_tokens_on_account_change(sender, instance, raw=False, using=None, **kwargs):
+    if raw or instance._state.adding:
+        return
+    old = sender.objects.using(using).filter(pk=instance.pk).values_list(*USER_CLAIM_FIELDS).first()
+    if old is not None and old != tuple(getattr(instance, field) for field in USER_CLAIM_FIELDS):
+        # Only once the new password or flags are committed; a rolled back save revokes nothing
+        transaction.on_commit(partial(revoke_tokens, instance.pk), using=using)
+
+
+@receiver(pre_save, sender=UserProfile)
+def bump_token_version(sender, instance, raw=False, **kwargs):
+    # A new role or assignment must not be served from older tokens' claims
+    if raw or instance._state.adding:
+        return
+    old = UserProfile.objects.filter(pk=instance.pk).values_list(*PROFILE_CLAIM_FIELDS).first()
+    if old is not None and old != tuple(getattr(instance, field) for field in PROFILE_CLAIM_FIELDS):
+        instance.token_version += 1
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def drop_cached_me(sender, instance, using=None, **kwargs):
+    response_cache.invalidate_me(instance.pk, using=using)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def drop_cached_profile(sender, instance, using=None, **kwargs):
+    response_cache.invalidate_me(instance.user_id, using=using)
+    forget_token_version(instance.user_id, using=using)
+
+
+@receiver(post_save, sender=Province)
+@receiver(post_save, sender=District)
+@receiver(post_save, sender=Office)
+@receiver(post_delete, sender=Office)
+def reload_office_directory(sender, **kwargs):
+    # Renames in the Django admin show up in this process straight away; other workers within OFFICE_DIRECTORY_TTL
+    office_directory.invalidate()
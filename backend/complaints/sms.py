@@ -0,0 +1,46 @@
+"""Pluggable SMS gateways, selected by ``settings.SMS_GATEWAY``.
+
+A gateway is any class with ``send(recipient, body)`` that raises on
+failure; the outbox worker retries it with backoff. The two bundled ones
+are stand-ins for development: ``ConsoleGateway`` prints each message and
+``FileGateway`` appends it to ``SMS_FILE_PATH``. Production points the
+setting at a provider integration.
+"""
+
+import sys
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class ConsoleGateway:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, recipient, body):
+        self.stream.write(f"SMS to {recipient}: {body}\n")
+        self.stream.flush()
+
+
+class FileGateway:
+    def __init__(self, path=None):
+        self.path = path or settings.SMS_FILE_PATH
+
+    def send(self, recipient, body):
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(f"{timezone.now().isoformat()}\t{recipient}\t{body}\n")
+
+
+@lru_cache(maxsize=None)
+def get_gateway():
+    return import_string(settings.SMS_GATEWAY)()
+
+
+@receiver(setting_changed)
+def _reset_gateway(setting, **kwargs):
+    if setting in ("SMS_GATEWAY", "SMS_FILE_PATH"):
+        get_gateway.cache_clear()
@@ -0,0 +1,88 @@
+"""Maintenance and reads of the ``ComplaintStat`` summary table."""
+
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import STAT_KEY_FIELDS, STAT_KEY_SOURCE, ArchivedComplaint, Complaint, ComplaintStat, stat_key_for
+
+
+def _key_filter(key):
+    return {field: value or "" for field, value in zip(STAT_KEY_FIELDS, key)}
+
+
+def apply_delta(key, delta: int, using=None):
+    """Add ``delta`` to the counter for ``key`` (a ``Complaint.stat_key()`` tuple)."""
+    if not delta:
+        return
+    lookup = _key_filter(key)
+    stats = ComplaintStat.objects.using(using)
+    if stats.filter(**lookup).update(count=F("count") + delta):
+        return
+    try:
+        with transaction.atomic(using=using):
+            stats.create(count=delta, **lookup)
+    except IntegrityError:
+        # Another transaction created the bucket first
+        stats.filter(**lookup).update(count=F("count") + delta)
+
+
+def move(old_key, new_key, using=None):
+    """Move one complaint from ``old_key`` to ``new_key`` (either may be None)."""
+    if old_key == new_key:
+        return
+    if old_key is not None:
+        apply_delta(old_key, -1, using=using)
+    if new_key is not None:
+        apply_delta(new_key, 1, using=using)
+
+
+def apply_moves(moves, using=None):
+    """Apply many ``(old_key, new_key)`` moves with one counter update per bucket."""
+    deltas = Counter()
+    for old_key, new_key in moves:
+        if old_key == new_key:
+            continue
+        deltas[old_key] -= 1
+        deltas[new_key] += 1
+    for key, delta in deltas.items():
+        apply_delta(key, delta, using=using)
+
+
+def rebuild(using=None):
+    """Recompute every counter from the complaint and archive tables."""
+    with transaction.atomic(using=using):
+        ComplaintStat.objects.using(using).all().delete()
+        totals = Counter()
+        for model in (Complaint, ArchivedComplaint):
+            grouped = (
+                model.objects.using(using)
+                .order_by()
+                .values_list(*STAT_KEY_SOURCE)
+                .annotate(total=Count("id"))
+            )
+            for *source, total in grouped:
+                # Blank and NULL locations share a bucket
+                totals[tuple(_key_filter(stat_key_for(*source)).values())] += total
+        ComplaintStat.objects.using(using).bulk_create(
+            [ComplaintStat(count=total, **_key_filter(key)) for key, total in totals.items()],
+            batch_size=1000,
+        )
+
+
+def summarize(rows):
+    """Fold ``(office, category, status, count)`` rows into dashboard totals."""
+    by_status, by_category, by_office = Counter(), Counter(), Counter()
+    for office, category, status, count in rows:
+        by_status[status] += count
+        by_category[category] += count
+        by_office[office or ""] += count
+    for status, _ in Complaint.STATUS_CHOICES:
+        by_status.setdefault(status, 0)
+    return {
+        "total": sum(by_status.values()),
+        "by_status": dict(by_status),
+        "by_category": dict(by_category),
+        "by_office": dict(by_office),
+    }
@@ -0,0 +1,98 @@
+"""Async server-sent events endpoint; run under ASGI (``core.asgi``).
+
+Under WSGI a stream would hold a sync worker for its whole life (past
+gunicorn's timeout), so the endpoint answers 501 there instead.
+
+EventSource cannot send an Authorization header, and a JWT in the URL would
+be written to every access log. Browsers therefore POST (with their JWT) to
+``complaints/events/ticket/`` for a ticket that opens one stream as
+``?ticket=``, within ``COMPLAINT_EVENTS_TICKET_SECONDS``. Other clients may
+send the usual bearer header instead.
+"""
+
+import asyncio
+import json
+import secrets
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from .async_views import aauthenticate
+from .events import get_broker, scope_matcher
+from .models import UserProfile
+
+
+TICKET_PREFIX = "events:ticket"
+
+
+@api_view(["POST"])
+def stream_ticket(request):
+    """Issue a short-lived, single-use ticket for opening one event stream."""
+    ticket = secrets.token_urlsafe(32)
+    cache.set(f"{TICKET_PREFIX}:{ticket}", request.user.pk, settings.COMPLAINT_EVENTS_TICKET_SECONDS)
+    return Response({"ticket": ticket, "expires_in": settings.COMPLAINT_EVENTS_TICKET_SECONDS})
+
+
+async def aredeem_ticket(ticket):
+    """The active user a ticket was issued to, or None; the ticket is used up either way."""
+    key = f"{TICKET_PREFIX}:{ticket}"
+    user_id = await cache.aget(key)
+    # Only the caller whose delete removed the key may use it
+    if user_id is None or not await cache.adelete(key):
+        return None
+    return await get_user_model().objects.filter(pk=user_id, is_active=True).afirst()
+
+
+def _format(event):
+    public = {key: value for key, value in event.items() if key != "user_id"}
+    return f"event: {event['type']}\ndata: {json.dumps(public)}\n\n"
+
+
+async def complaint_events(request):
+    """Push complaint created/status-changed events in the caller's scope.
+
+    Streams are closed after ``COMPLAINT_EVENTS_MAX_STREAM_AGE`` seconds; the
+    browser's EventSource reconnects on its own.
+    """
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed"}, status=405)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "Event streams need the ASGI server (DJANGO_SERVER_MODE=asgi)."}, status=501
+        )
+    ticket = request.GET.get("ticket")
+    user = await aredeem_ticket(ticket) if ticket else await aauthenticate(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    profile = await UserProfile.objects.filter(user_id=user.pk).afirst()
+    admin = user.is_staff or getattr(profile, "role", "user") == "admin"
+    broker = get_broker()
+    subscription = await broker.subscribe(scope_matcher(user.pk, admin, profile))
+
+    async def stream():
+        deadline = time.monotonic() + settings.COMPLAINT_EVENTS_MAX_STREAM_AGE
+        try:
+            yield "retry: 5000\n\n"
+            while time.monotonic() < deadline:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), settings.COMPLAINT_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield _format(event)
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
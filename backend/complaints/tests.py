@@ -1,12 +1,100 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import CacheKeyWarning
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth.models import User
-from .models import Complaint
+from core.db_router import PrimaryReplicaRouter, ReplicaRoutingMiddleware
+from . import async_views, authentication
+from .backends import find_user
+from .events import LocalBroker, scope_matcher
+from .locations import get_index as get_location_index, get_offices, is_valid_location
+from .models import (
+    ArchivedComplaint,
+    Complaint,
+    ComplaintStat,
+    ComplaintNotification,
+    ComplaintStatusChange,
+    ComplaintTombstone,
+    Office,
+    OutboundMessage,
+    UserProfile,
+)
+from .notifications import queue_digests
+from .offices import directory as office_directory
+from .outbox import claim_batch, deliver_batch, enqueue_email, enqueue_sms, process_outbox
+from .pagination import ComplaintCursorPagination
+from .throttling import rate_limit
+from .transitions import TransitionConflict, apply_transition
+from .views import ComplaintViewSet
+
+
+LOCATION = {"province": "Bagmati", "district": "Kathmandu", "office": "Ward Office"}
+
+
+def make_user(username):
+    return User.objects.create_user(username=username, email=f"{username}@example.com", password="pass1234")
+
+
+def make_admin(username="officer", **assigned):
+    """An admin whose profile is assigned to ``assigned`` (``province``/``district``/``office``)."""
+    admin = make_user(username)
+    UserProfile.objects.create(user=admin, role="admin", **{f"assigned_{k}": v for k, v in assigned.items()})
+    return admin
+
+
+class OfficeFixtureMixin:
+    """``self.citizen``, and ``self.admin`` assigned to ``admin_scope`` (default: all of ``location``)."""
+
+    location = LOCATION
+    admin_scope = None
+
+    def setUp(self):
+        super().setUp()
+        self.citizen = make_user("citizen")
+        self.admin = make_admin(**(self.admin_scope or self.location))
+
 
+class AuthEndpointTestCase(APITestCase):
+    """For tests calling the rate-limited auth endpoints.
 
-class ComplaintAPITest(APITestCase):
+    The counters live in process memory, not the rolled back test database,
+    so each test starts them afresh.
+    """
+
+    def setUp(self):
+        super().setUp()
+        caches["ratelimit"].clear()
+
+
+class ComplaintAPITest(AuthEndpointTestCase):
     def setUp(self):
+        super().setUp()
         self.user = User.objects.create_user(username="user", password="pass1234")
         self.admin = User.objects.create_superuser(username="admin", password="admin1234", email="admin@example.com")
 
@@ -30,3 +118,1091 @@ class ComplaintAPITest(APITestCase):
         url = reverse("complaint-detail", args=[complaint.id])
         response = self.client.patch(url, {"status": "Resolved"})
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ComplaintPaginationTest(APITestCase):
+    def setUp(self):
+        self.user = make_user("citizen")
+        for i in range(5):
+            Complaint.objects.create(user=self.user, title=f"Complaint {i}", description="", category="General")
+        self.client.force_authenticate(self.user)
+
+    def test_list_is_cursor_paginated_newest_first(self):
+        url = reverse("complaint-list")
+        response = self.client.get(url, {"page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c["title"] for c in response.data["results"]], ["Complaint 4", "Complaint 3"])
+
+        seen = [c["id"] for c in response.data["results"]]
+        next_url = response.data["next"]
+        while next_url:
+            response = self.client.get(next_url)
+            seen.extend(c["id"] for c in response.data["results"])
+            next_url = response.data["next"]
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(len(seen), 5)
+
+    @override_settings(RESPONSE_CACHE_SECONDS=0)
+    def test_next_link_keeps_the_proxy_scheme(self):
+        # TLS ends at the proxy; the app sees http plus X-Forwarded-Proto
+        response = self.client.get(reverse("complaint-list"), {"page_size": 2}, HTTP_X_FORWARDED_PROTO="https")
+        self.assertTrue(response.data["next"].startswith("https://"), response.data["next"])
+
+    def test_page_size_is_capped(self):
+        url = reverse("complaint-list")
+        with mock.patch.object(ComplaintCursorPagination, "max_page_size", 3):
+            response = self.client.get(url, {"page_size": 10_000})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 3)
+
+
+@override_settings(RESPONSE_CACHE_SECONDS=0)
+class ComplaintQueryCountTest(OfficeFixtureMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.complaint = self.make_complaints(1)[0]
+
+    def make_complaints(self, count):
+        return [
+            Complaint.objects.create(user=self.citizen, title=f"Complaint {i}", description="", category="General", **self.location)
+            for i in range(count)
+        ]
+
+    def assert_constant_queries(self, user, url, expected):
+        self.client.force_authenticate(user)
+        with self.assertNumQueries(expected):
+            self.client.get(url)
+        self.make_complaints(20)
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_citizen_list_queries(self):
+        # profile, scope aggregate, tombstone aggregate, page
+        response = self.assert_constant_queries(self.citizen, reverse("complaint-list"), 4)
+        self.assertEqual(response.data["results"][0]["user"], "citizen")
+
+    def test_admin_list_queries(self):
+        self.assert_constant_queries(self.admin, reverse("complaint-list"), 4)
+
+    def test_detail_queries(self):
+        self.assert_constant_queries(self.citizen, reverse("complaint-detail", args=[self.complaint.id]), 2)
+
+    def test_admin_patch_queries(self):
+        Complaint.objects.create(
+            user=self.citizen, title="Other", description="", category="General", status="In Progress", **self.location
+        )
+        self.client.force_authenticate(self.admin)
+        url = reverse("complaint-detail", args=[self.complaint.id])
+        # profile, row, savepoint, update, two stat counters, history row, notification, release
+        with self.assertNumQueries(9):
+            response = self.client.patch(url, {"status": "In Progress", "remarks": "On it"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ComplaintFilterSearchTest(APITestCase):
+    def setUp(self):
+        self.user = make_user("citizen")
+        self.client.force_authenticate(self.user)
+        self.water = Complaint.objects.create(
+            user=self.user, title="No water supply", description="Water has been off for days", category="Water"
+        )
+        self.light = Complaint.objects.create(
+            user=self.user, title="Street light", description="Broken light near the water tank", category="Electricity",
+            status="Resolved",
+        )
+
+    def list(self, **params):
+        response = self.client.get(reverse("complaint-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [c["id"] for c in response.data["results"]]
+
+    def test_filters(self):
+        self.assertEqual(self.list(status="Resolved"), [self.light.id])
+        self.assertEqual(self.list(status="Pending,Resolved"), [self.light.id, self.water.id])
+        self.assertEqual(self.list(category="Water"), [self.water.id])
+        self.assertEqual(self.list(created_after="2000-01-01", created_before="2001-01-01"), [])
+
+    def test_invalid_date_is_rejected(self):
+        response = self.client.get(reverse("complaint-list"), {"created_after": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_is_ranked_and_tracks_updates(self):
+        self.assertEqual(self.list(q="water"), [self.water.id, self.light.id])
+        self.assertEqual(self.list(q="light"), [self.light.id])
+
+        self.water.description = "Pipes are fixed but the light is out"
+        self.water.save()
+        self.assertEqual(set(self.list(q="light")), {self.water.id, self.light.id})
+        self.assertEqual(self.list(q='light* "('), self.list(q="light"))
+
+    def test_tied_search_results_page_without_gaps(self):
+        tied = [
+            Complaint.objects.create(user=self.user, title="Pothole", description="Pothole", category="Roads").id
+            for _ in range(5)
+        ]
+        seen, url, params = [], reverse("complaint-list"), {"q": "pothole", "page_size": 2}
+        while url:
+            response = self.client.get(url, params)
+            seen += [c["id"] for c in response.data["results"]]
+            url, params = response.data["next"], None
+        self.assertEqual(seen, sorted(tied, reverse=True))
+
+
+class ComplaintChangesTest(APITestCase):
+    def setUp(self):
+        self.user = make_user("citizen")
+        self.other = make_user("other")
+        self.client.force_authenticate(self.user)
+        self.first = Complaint.objects.create(user=self.user, title="First", description="", category="General")
+        self.second = Complaint.objects.create(user=self.user, title="Second", description="", category="General")
+        Complaint.objects.create(user=self.other, title="Not mine", description="", category="General")
+
+    def changes(self, since=""):
+        response = self.client.get(reverse("complaint-changes"), {"since": since, "page_size": 50})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return response.data
+
+    def test_full_then_delta_sync(self):
+        data = self.changes()
+        self.assertEqual([c["id"] for c in data["changes"]], [self.first.id, self.second.id])
+        self.assertFalse(data["has_more"])
+
+        data = self.changes(data["next"])
+        self.assertEqual(data["changes"], [])
+        self.assertEqual(data["deleted"], [])
+
+        token = data["next"]
+        self.first.title = "First (edited)"
+        self.first.save()
+        second_id = self.second.id
+        self.second.delete()
+        Complaint.objects.filter(user=self.other).delete()
+
+        data = self.changes(token)
+        self.assertEqual([c["title"] for c in data["changes"]], ["First (edited)"])
+        self.assertEqual(data["deleted"], [second_id])
+
+    def test_invalid_token(self):
+        response = self.client.get(reverse("complaint-changes"), {"since": "not-a-token"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        self.user = make_user("citizen")
+        self.client.force_authenticate(self.user)
+        self.complaint = Complaint.objects.create(user=self.user, title="First", description="", category="General")
+
+    def assert_revalidates(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        return etag
+
+    def test_list_and_detail_revalidate_until_changed(self):
+        list_url = reverse("complaint-list")
+        detail_url = reverse("complaint-detail", args=[self.complaint.id])
+        list_etag = self.assert_revalidates(list_url)
+        detail_etag = self.assert_revalidates(detail_url)
+
+        self.complaint.remarks = "Updated"
+        self.complaint.save()
+        self.assertEqual(self.client.get(list_url, HTTP_IF_NONE_MATCH=list_etag).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag).status_code, status.HTTP_200_OK)
+
+    def test_list_etag_tracks_deletes_and_query(self):
+        list_url = reverse("complaint-list")
+        etag = self.assert_revalidates(list_url)
+        filtered = self.client.get(list_url, {"status": "Pending"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(filtered.status_code, status.HTTP_200_OK)
+
+        Complaint.objects.create(user=self.user, title="Second", description="", category="General").delete()
+        self.assertEqual(self.client.get(list_url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_me_and_locations(self):
+        self.assert_revalidates(reverse("me"))
+        self.assert_revalidates(reverse("locations"))
+        self.assertIn("max-age", self.client.get(reverse("locations"))["Cache-Control"])
+
+
+class ComplaintStatsTest(OfficeFixtureMixin, APITestCase):
+    admin_scope = {"province": "Bagmati", "district": "Kathmandu"}
+
+    def setUp(self):
+        super().setUp()
+        self.first = Complaint.objects.create(user=self.citizen, title="A", description="", category="Water", **self.location)
+        self.second = Complaint.objects.create(user=self.citizen, title="B", description="", category="Roads", **self.location)
+        Complaint.objects.create(
+            user=self.citizen, title="C", description="", category="Water",
+            province="Bagmati", district="Lalitpur", office="Ward Office",
+        )
+
+    def stats(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse("complaint-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_admin_stats_follow_transitions_and_deletes(self):
+        data = self.stats(self.admin)
+        self.assertEqual(data["total"], 2)
+        self.assertEqual(data["by_status"]["Pending"], 2)
+        self.assertEqual(data["by_category"], {"Water": 1, "Roads": 1})
+
+        self.first.status = "In Progress"
+        self.first.save()
+        Complaint.objects.get(pk=self.second.pk).delete()
+        data = self.stats(self.admin)
+        self.assertEqual(data["total"], 1)
+        self.assertEqual(data["by_status"], {"Pending": 0, "In Progress": 1, "Rejected": 0, "Resolved": 0})
+
+    def test_citizen_stats_and_rebuild(self):
+        self.assertEqual(self.stats(self.citizen)["total"], 3)
+        ComplaintStat.objects.update(count=0)
+        call_command("rebuild_complaint_stats", stdout=io.StringIO())
+        self.assertEqual(self.stats(self.admin)["total"], 2)
+
+
+class ComplaintBulkUpdateTest(OfficeFixtureMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.pending = Complaint.objects.create(user=self.citizen, title="A", description="", category="Water", **self.location)
+        self.resolved = Complaint.objects.create(
+            user=self.citizen, title="B", description="", category="Water", status="Resolved", **self.location
+        )
+        self.elsewhere = Complaint.objects.create(
+            user=self.citizen, title="C", description="", category="Water",
+            province="Bagmati", district="Lalitpur", office="Ward Office",
+        )
+        self.url = reverse("complaint-bulk-update")
+
+    def test_applies_valid_items_and_reports_the_rest(self):
+        self.client.force_authenticate(self.admin)
+        payload = [
+            {"id": self.pending.id, "status": "In Progress", "remarks": "Crew sent"},
+            {"id": self.resolved.id, "status": "Pending"},
+            {"id": self.elsewhere.id, "remarks": "Not my office"},
+            {"id": self.pending.id, "remarks": "Again"},
+            {"id": self.pending.id, "title": "Nope"},
+        ]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r["ok"] for r in response.data["results"]], [True, False, False, False, False])
+
+        self.pending.refresh_from_db()
+        self.assertEqual((self.pending.status, self.pending.remarks), ("In Progress", "Crew sent"))
+        self.assertEqual(ComplaintStat.objects.get(status="In Progress").count, 1)
+        self.assertEqual(ComplaintStat.objects.get(status="Pending", district="Kathmandu").count, 0)
+
+    def test_citizens_cannot_bulk_update(self):
+        self.client.force_authenticate(self.citizen)
+        response = self.client.post(self.url, [{"id": self.pending.id, "status": "Rejected"}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ComplaintTransitionTest(OfficeFixtureMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.complaint = Complaint.objects.create(
+            user=self.citizen, title="Leak", description="Pipe burst", category="Water", **self.location
+        )
+        self.url = reverse("complaint-detail", args=[self.complaint.id])
+
+    def test_lost_race_is_rejected(self):
+        first, second = Complaint.objects.get(pk=self.complaint.pk), Complaint.objects.get(pk=self.complaint.pk)
+        apply_transition(first, {"status": "In Progress"})
+        with self.assertRaises(TransitionConflict):
+            apply_transition(second, {"status": "Rejected"})
+        self.complaint.refresh_from_db()
+        self.assertEqual(self.complaint.status, "In Progress")
+        self.assertEqual(ComplaintStat.objects.get(status="In Progress").count, 1)
+        self.assertEqual(ComplaintStat.objects.get(status="Pending").count, 0)
+
+    def test_patch_returns_conflict_for_stale_status(self):
+        self.client.force_authenticate(self.admin)
+        stale = Complaint.objects.get(pk=self.complaint.pk)
+        Complaint.objects.filter(pk=self.complaint.pk).update(status="Rejected")
+        with mock.patch.object(ComplaintViewSet, "get_object", return_value=stale):
+            response = self.client.patch(self.url, {"status": "In Progress"})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_patch_writes_only_status_and_remarks(self):
+        self.client.force_authenticate(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, {"status": "In Progress", "remarks": "Crew sent"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["status"], response.data["remarks"]), ("In Progress", "Crew sent"))
+        update = next(q["sql"] for q in queries if q["sql"].startswith('UPDATE "complaints_complaint"'))
+        self.assertNotIn('"description"', update)
+        self.assertIn('"status" = \'Pending\'', update.split("WHERE")[1])
+
+
+class ComplaintHistoryTest(OfficeFixtureMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.complaint = Complaint.objects.create(user=self.citizen, title="Leak", description="", category="Water", **self.location)
+        self.elsewhere = Complaint.objects.create(
+            user=self.citizen, title="Far", description="", category="Water",
+            province="Bagmati", district="Lalitpur", office="Ward Office",
+        )
+
+    def test_timeline_lists_every_change(self):
+        self.client.force_authenticate(self.admin)
+        url = reverse("complaint-detail", args=[self.complaint.id])
+        self.client.patch(url, {"status": "In Progress", "remarks": "Crew sent"})
+        self.client.patch(url, {"remarks": "Parts ordered"})
+        self.client.post(reverse("complaint-bulk-update"), [{"id": self.complaint.id, "status": "Resolved"}], format="json")
+
+        self.client.force_authenticate(self.citizen)
+        response = self.client.get(reverse("complaint-timeline", args=[self.complaint.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        steps = [(r["from_status"], r["to_status"], r["remarks"], r["actor"]) for r in response.data["results"]]
+        self.assertEqual(steps, [
+            ("Pending", "In Progress", "Crew sent", "officer"),
+            ("In Progress", "In Progress", "Parts ordered", "officer"),
+            ("In Progress", "Resolved", "Parts ordered", "officer"),
+        ])
+
+    def test_full_saves_follow_the_patch_rule(self):
+        self.client.force_authenticate(self.admin)
+        url = reverse("complaint-detail", args=[self.complaint.id])
+        body = {"title": "Leak", "description": "Pipe burst", "category": "Water", **self.location}
+        response = self.client.put(url, {**body, "status": "Pending", "remarks": "Looking into it"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.client.put(url, {**body, "status": "Pending", "remarks": "Looking into it"})
+        self.client.patch(url, {"remarks": "Looking into it"})
+        self.client.put(url, {**body, "status": "In Progress", "remarks": "Looking into it"})
+        steps = ComplaintStatusChange.objects.filter(complaint_id=self.complaint.id).order_by("id")
+        self.assertEqual(
+            [(r.from_status, r.to_status, r.remarks, r.actor_id) for r in steps],
+            [
+                ("Pending", "Pending", "Looking into it", self.admin.pk),
+                ("Pending", "In Progress", "Looking into it", self.admin.pk),
+            ],
+        )
+
+    def test_history_survives_delete_and_full_saves(self):
+        self.elsewhere.status = "Rejected"
+        self.elsewhere.save()
+        self.elsewhere.delete()
+        self.assertEqual(ComplaintStatusChange.objects.get().to_status, "Rejected")
+
+    def test_activity_feed_is_scoped_and_paginated(self):
+        for remarks in ("one", "two", "three"):
+            apply_transition(self.complaint, {"remarks": remarks}, actor=self.admin)
+        apply_transition(self.elsewhere, {"status": "Rejected"})
+
+        self.client.force_authenticate(self.citizen)
+        self.assertEqual(self.client.get(reverse("complaint-activity")).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(reverse("complaint-activity"), {"page_size": 2})
+        self.assertEqual([r["remarks"] for r in response.data["results"]], ["three", "two"])
+        response = self.client.get(response.data["next"])
+        self.assertEqual([r["remarks"] for r in response.data["results"]], ["one"])
+        self.assertIsNone(response.data["next"])
+
+
+class ComplaintArchiveTest(OfficeFixtureMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.old_closed = [self.make("Old resolved", "Resolved"), self.make("Old rejected", "Rejected")]
+        self.old_open = self.make("Old pending", "Pending")
+        self.recent_closed = self.make("Recent resolved", "Resolved")
+        Complaint.objects.exclude(pk=self.recent_closed.pk).update(updated_at=timezone.now() - timedelta(days=400))
+
+    def make(self, title, status):
+        return Complaint.objects.create(
+            user=self.citizen, title=title, description="", category="Water", status=status, **self.location
+        )
+
+    def archive(self):
+        call_command("archive_complaints", days=180, batch_size=1, stdout=io.StringIO())
+
+    def test_moves_only_old_closed_complaints(self):
+        self.archive()
+        self.assertEqual(
+            set(ArchivedComplaint.objects.values_list("id", flat=True)), {c.pk for c in self.old_closed}
+        )
+        self.assertEqual(Complaint.objects.count(), 2)
+        self.assertFalse(ComplaintTombstone.objects.exists())
+
+    def test_reads_fall_through_to_archive(self):
+        self.archive()
+        self.client.force_authenticate(self.citizen)
+        hot = self.client.get(reverse("complaint-list"))
+        self.assertEqual({c["title"] for c in hot.data["results"]}, {"Old pending", "Recent resolved"})
+        cold = self.client.get(reverse("complaint-list"), {"archived": "true"})
+        self.assertEqual({c["title"] for c in cold.data["results"]}, {"Old resolved", "Old rejected"})
+
+        archived_id = self.old_closed[0].pk
+        response = self.client.get(reverse("complaint-detail", args=[archived_id]))
+        self.assertEqual((response.status_code, response.data["user"]), (status.HTTP_200_OK, "citizen"))
+        self.assertEqual(self.client.get(reverse("complaint-timeline", args=[archived_id])).status_code, 200)
+        self.assertEqual(self.client.get(reverse("complaint-stats")).data["total"], 4)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch(reverse("complaint-detail", args=[archived_id]), {"remarks": "Late"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stats_keep_counting_archived_complaints(self):
+        self.archive()
+        self.client.force_authenticate(self.admin)
+        before = self.client.get(reverse("complaint-stats")).data
+        self.assertEqual(before["by_status"]["Resolved"], 2)
+        call_command("rebuild_complaint_stats", stdout=io.StringIO())
+        self.assertEqual(self.client.get(reverse("complaint-stats")).data, before)
+
+
+class ComplaintExportTest(APITestCase):
+    def setUp(self):
+        self.user = make_user("citizen")
+        other = make_user("other")
+        Complaint.objects.create(user=self.user, title="Pothole, main road", description="Deep\nhole", category="Roads")
+        Complaint.objects.create(user=self.user, title="Leak", description="", category="Water", status="Resolved")
+        Complaint.objects.create(user=other, title="Not mine", description="", category="Water")
+        self.client.force_authenticate(self.user)
+
+    def export(self, **params):
+        response = self.client.get(reverse("complaint-export"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export_is_scoped(self):
+        rows = list(csv.DictReader(io.StringIO(self.export())))
+        self.assertEqual([row["title"] for row in rows], ["Leak", "Pothole, main road"])
+        self.assertEqual(rows[1]["description"], "Deep\nhole")
+
+    def test_csv_neutralizes_formulas(self):
+        Complaint.objects.create(user=self.user, title="=HYPERLINK(\"http://evil\")", description="-1+2", category="Roads")
+        rows = list(csv.DictReader(io.StringIO(self.export(category="Roads"))))
+        self.assertEqual(rows[0]["title"], "'=HYPERLINK(\"http://evil\")")
+        self.assertEqual(rows[0]["description"], "'-1+2")
+        # NDJSON is data, not a spreadsheet: values stay untouched
+        lines = self.export(**{"as": "ndjson", "category": "Roads"}).splitlines()
+        self.assertEqual(json.loads(lines[0])["description"], "-1+2")
+
+    def test_ndjson_export_with_filters(self):
+        lines = self.export(**{"as": "ndjson", "status": "Resolved"}).splitlines()
+        self.assertEqual([json.loads(line)["title"] for line in lines], ["Leak"])
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse("complaint-export"), {"as": "xlsx"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ComplaintEventsTest(APITestCase):
+    location = LOCATION
+
+    def setUp(self):
+        self.citizen = make_user("citizen")
+        self.other = make_user("other")
+        self.broker = LocalBroker()
+        for target in ("complaints.events.get_broker", "complaints.streams.get_broker"):
+            patcher = mock.patch(target, return_value=self.broker)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def collect(self, match, write):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        subscription = loop.run_until_complete(self.broker.subscribe(match))
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        loop.run_until_complete(asyncio.sleep(0))
+        self.broker.unsubscribe(subscription)
+        events = []
+        while not subscription.queue.empty():
+            events.append(subscription.queue.get_nowait())
+        return events
+
+    def test_citizen_receives_only_own_events(self):
+        def write():
+            complaint = Complaint.objects.create(user=self.citizen, title="A", description="", category="Water", **self.location)
+            Complaint.objects.create(user=self.other, title="B", description="", category="Water", **self.location)
+            complaint.status = "In Progress"
+            complaint.save()
+            complaint.remarks = "No status change"
+            complaint.save()
+
+        events = self.collect(scope_matcher(self.citizen.pk, admin=False), write)
+        self.assertEqual([e["type"] for e in events], ["complaint.created", "complaint.status_changed"])
+        self.assertEqual(events[1]["previous_status"], "Pending")
+
+    def test_admin_receives_events_in_assigned_area(self):
+        profile = UserProfile(assigned_province="Bagmati", assigned_district="Lalitpur")
+
+        def write():
+            Complaint.objects.create(user=self.citizen, title="A", description="", category="Water", **self.location)
+            Complaint.objects.create(
+                user=self.other, title="B", description="", category="Water",
+                province="Bagmati", district="Lalitpur", office="Water Supply",
+            )
+
+        events = self.collect(scope_matcher(None, admin=True, profile=profile), write)
+        self.assertEqual([e["title"] for e in events], ["B"])
+
+    async def test_stream_requires_token(self):
+        response = await self.async_client.get(reverse("complaint_events"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_stream_delivers_own_events_to_login_token(self):
+        token = (await sync_to_async(authentication.ScopedTokenObtainPairSerializer.get_token)(self.citizen)).access_token
+        response = await self.async_client.get(reverse("complaint_events"), AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        chunks = aiter(response.streaming_content)
+        self.assertIn(b"retry:", await anext(chunks))
+        for user in (self.other, self.citizen):
+            self.broker.dispatch({
+                "type": "complaint.created", "id": user.pk, "user_id": user.pk, "title": user.username,
+                **self.location,
+            })
+        chunk = await asyncio.wait_for(anext(chunks), 5)
+        self.assertIn(b'"title": "citizen"', chunk)
+        await response.streaming_content.aclose()
+
+    async def test_browser_streams_open_with_a_single_use_ticket(self):
+        token = (await sync_to_async(authentication.ScopedTokenObtainPairSerializer.get_token)(self.citizen)).access_token
+        url = reverse("complaint_events")
+        # A JWT in the URL would be written to the access log
+        response = await self.async_client.get(url, {"token": str(token)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = await self.async_client.post(reverse("complaint_events_ticket"), AUTHORIZATION=f"Bearer {token}")
+        ticket = json.loads(response.content)["ticket"]
+        response = await self.async_client.get(url, {"ticket": ticket})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        await response.streaming_content.aclose()
+        response = await self.async_client.get(url, {"ticket": ticket})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stream_is_refused_under_wsgi(self):
+        # A sync worker would be held for the life of the stream
+        self.client.force_authenticate(self.citizen)
+        response = self.client.get(reverse("complaint_events"))
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+
+class AsyncReadViewsTest(APITestCase):
+    def setUp(self):
+        self.user = make_user("citizen")
+        self.other = make_user("other")
+        self.complaint = Complaint.objects.create(user=self.user, title="Mine", description="", category="Water")
+        Complaint.objects.create(user=self.other, title="Theirs", description="", category="Water")
+        self.factory = RequestFactory()
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    def call(self, view, path, *args, **extra):
+        # async_to_sync keeps the ORM on this thread, inside the test transaction
+        return async_to_sync(view)(self.factory.get(path, **{**self.auth, **extra}), *args)
+
+    def test_list_matches_sync_view(self):
+        response = self.call(async_views.complaint_list, "/api/complaints/?page_size=1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        payload = json.loads(response.content)
+        self.assertEqual([c["title"] for c in payload["results"]], ["Mine"])
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(payload["results"], self.client.get(reverse("complaint-list")).data["results"])
+        self.assertEqual(self.call(async_views.complaint_list, "/api/complaints/?page_size=1", HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    @override_settings(RESPONSE_CACHE_SECONDS=0)
+    def test_search_page_matches_sync_view(self):
+        payload = json.loads(self.call(async_views.complaint_list, "/api/complaints/?q=Mine").content)
+        self.client.force_authenticate(self.user)
+        expected = self.client.get(reverse("complaint-list"), {"q": "Mine"}).data
+        self.assertEqual(list(payload), list(expected))
+        self.assertEqual((payload["count"], payload["results"]), (expected["count"], expected["results"]))
+
+    def test_detail_is_scoped(self):
+        self.assertEqual(self.call(async_views.complaint_detail, "/", self.complaint.pk).status_code, 200)
+        other = Complaint.objects.exclude(pk=self.complaint.pk).get()
+        self.assertEqual(self.call(async_views.complaint_detail, "/", other.pk).status_code, 404)
+
+    def test_me_and_auth(self):
+        response = self.call(async_views.me, "/api/me/")
+        self.assertEqual(json.loads(response.content)["email"], "citizen@example.com")
+        response = async_to_sync(async_views.me)(self.factory.get("/api/me/"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"], DATABASE_REPLICA_STICKY_SECONDS=60)
+class ReplicaRoutingTest(APITestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+        cache.clear()
+
+    def read_db(self, method="get", view_is_async=False, **meta):
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Complaint))
+            return HttpResponse()
+
+        async def async_view(request):
+            return view(request)
+
+        request = getattr(self.factory, method)("/", **meta)
+        if view_is_async:
+            async_to_sync(ReplicaRoutingMiddleware(async_view))(request)
+        else:
+            ReplicaRoutingMiddleware(view)(request)
+        return seen[0]
+
+    def test_reads_use_replica_except_during_writes(self):
+        self.assertEqual(self.read_db(), "replica1")
+        self.assertEqual(self.read_db(view_is_async=True), "replica1")
+        self.assertEqual(self.read_db("post"), "default")
+        self.assertEqual(self.router.db_for_write(Complaint), "default")
+        # Outside any request
+        self.assertEqual(self.router.db_for_read(Complaint), "default")
+
+    def test_client_sticks_to_primary_after_writing(self):
+        alice = {"HTTP_AUTHORIZATION": "Bearer alice", "REMOTE_ADDR": "10.0.0.1"}
+        bob = {"HTTP_AUTHORIZATION": "Bearer bob", "REMOTE_ADDR": "10.0.0.2"}
+        self.read_db("patch", **alice)
+        self.assertEqual(self.read_db(**alice), "default")
+        self.assertEqual(self.read_db(view_is_async=True, **alice), "default")
+        self.assertEqual(self.read_db(**bob), "replica1")
+        with override_settings(DATABASE_REPLICA_STICKY_SECONDS=0):
+            self.read_db("post", **bob)
+        self.assertEqual(self.read_db(**bob), "replica1")
+
+
+class ResponseCacheTest(APITestCase):
+    location = LOCATION
+
+    def setUp(self):
+        self.citizen = make_user("citizen")
+        self.admins = [make_admin(f"officer{i}", **self.location) for i in range(2)]
+        self.complaint = Complaint.objects.create(user=self.citizen, title="Leak", description="", category="Water", **self.location)
+
+    def complaint_queries(self, user, url):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, [q for q in queries if '"complaints_complaint"' in q["sql"]]
+
+    def test_list_is_shared_by_admins_of_one_area(self):
+        url = reverse("complaint-list")
+        _, queries = self.complaint_queries(self.admins[0], url)
+        self.assertTrue(queries)
+        response, queries = self.complaint_queries(self.admins[1], url)
+        self.assertEqual(queries, [])
+        self.assertEqual(response.data["results"][0]["title"], "Leak")
+
+    def test_scope_keys_are_safe_for_memcached(self):
+        # Office names carry spaces and "|"; keys must not
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", CacheKeyWarning)
+            self.complaint_queries(self.admins[0], reverse("complaint-list"))
+            self.client.force_authenticate(self.admins[0])
+            self.client.patch(reverse("complaint-detail", args=[self.complaint.id]), {"status": "In Progress"})
+
+    def test_writes_expire_every_scope(self):
+        list_url = reverse("complaint-list")
+        for user in (self.citizen, self.admins[0]):
+            self.complaint_queries(user, list_url)
+
+        self.client.force_authenticate(self.admins[1])
+        self.client.patch(reverse("complaint-detail", args=[self.complaint.id]), {"status": "In Progress"})
+        for user in (self.citizen, self.admins[0]):
+            response, queries = self.complaint_queries(user, list_url)
+            self.assertTrue(queries)
+            self.assertEqual(response.data["results"][0]["status"], "In Progress")
+
+    def test_me_is_cached_until_profile_changes(self):
+        self.complaint_queries(self.citizen, reverse("me"))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(reverse("me")).data["role"], "user")
+        # Reading me/ never creates the missing profile
+        self.assertFalse(UserProfile.objects.filter(user=self.citizen).exists())
+        profile = UserProfile(user=self.citizen)
+        profile.assigned_office = "Ward Office"
+        profile.save()
+        self.assertEqual(self.client.get(reverse("me")).data["assigned_office"], "Ward Office")
+
+
+def tiny_catalog():
+    return {"Karnali": {"Jumla": ["Ward Office"]}}
+
+
+class LocationCatalogTest(APITestCase):
+    def test_bundled_catalog_covers_nepal(self):
+        index = get_location_index()
+        self.assertEqual(len(index.provinces), 7)
+        self.assertEqual(sum(len(districts) for districts in index.districts.values()), 77)
+        self.assertEqual(list(index.districts["Bagmati"]), sorted(index.districts["Bagmati"]))
+        self.assertTrue(is_valid_location("Bagmati", "Kathmandu", "Ward Office"))
+        self.assertFalse(is_valid_location("Bagmati", "Jumla", "Ward Office"))
+
+    def test_endpoint_serves_prebuilt_body(self):
+        response = self.client.get(reverse("locations"))
+        self.assertEqual(response.content, get_location_index().body)
+        self.assertIn("Sudurpashchim", json.loads(response.content)["districts"])
+
+    def test_catalog_source_can_be_swapped(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as handle:
+            json.dump({"Koshi": {"Ilam": ["Water Supply", "Ward Office"]}}, handle)
+        self.addCleanup(os.unlink, handle.name)
+        with override_settings(LOCATION_CATALOG=handle.name):
+            self.assertEqual(get_location_index().provinces, ("Koshi",))
+            self.assertEqual(get_offices("Koshi", "Ilam"), ("Water Supply", "Ward Office"))
+        with override_settings(LOCATION_CATALOG="complaints.tests.tiny_catalog"):
+            self.assertTrue(is_valid_location("Karnali", "Jumla", "Ward Office"))
+            self.assertFalse(is_valid_location("Bagmati", "Kathmandu", "Ward Office"))
+        self.assertEqual(len(get_location_index().provinces), 7)
+
+
+class OfficeHierarchyTest(OfficeFixtureMixin, APITestCase):
+    admin_scope = {"province": "Bagmati", "district": "Kathmandu"}
+
+    def setUp(self):
+        super().setUp()
+        for district, office in (("Kathmandu", "Ward Office"), ("Kathmandu", "Water Supply"), ("Lalitpur", "Ward Office")):
+            Complaint.objects.create(
+                user=self.citizen, title=f"{district} {office}", description="", category="Water",
+                province="Bagmati", district=district, office=office,
+            )
+        # Offices created by a test are rolled back with it
+        self.addCleanup(office_directory.invalidate)
+
+    def test_complaints_store_an_office_id(self):
+        complaint = Complaint.objects.get(title="Lalitpur Ward Office")
+        office = Office.objects.select_related("district__province").get(pk=complaint.location_id)
+        self.assertEqual((office.district.province.name, office.district.name, office.name), ("Bagmati", "Lalitpur", "Ward Office"))
+        self.client.force_authenticate(self.citizen)
+        row = self.client.get(reverse("complaint-detail", args=[complaint.id])).data
+        self.assertEqual((row["province"], row["district"], row["office"]), ("Bagmati", "Lalitpur", "Ward Office"))
+
+    def test_admin_scope_filters_by_its_own_level(self):
+        self.client.force_authenticate(self.admin)
+        with override_settings(RESPONSE_CACHE_SECONDS=0), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("complaint-list"))
+        self.assertEqual(
+            sorted(row["title"] for row in response.data["results"]),
+            ["Kathmandu Ward Office", "Kathmandu Water Supply"],
+        )
+        page_query = next(q["sql"] for q in queries if "ORDER BY" in q["sql"] and '"complaints_complaint"' in q["sql"])
+        self.assertIn('"location_district_id" =', page_query)
+        self.assertNotIn("complaints_office", page_query)
+        # Each level reads its own index in order instead of sorting the matches
+        for scope in (("Bagmati",), ("Bagmati", "Kathmandu"), ("Bagmati", "Kathmandu", "Ward Office")):
+            plan = Complaint.objects.in_scope(*scope).newest_first().explain()
+            self.assertNotIn("TEMP B-TREE", plan)
+        self.assertEqual(Complaint.objects.in_scope("Bagmati").count(), 3)
+
+        response = self.client.get(reverse("complaint-list"), {"office": "Water Supply"})
+        self.assertEqual([row["title"] for row in response.data["results"]], ["Kathmandu Water Supply"])
+
+    def test_new_offices_are_created_on_save(self):
+        complaint = Complaint.objects.create(
+            user=self.citizen, title="New office", description="", category="Roads",
+            province="Karnali", district="Jumla", office="Road Division",
+        )
+        self.assertEqual(Office.objects.get(pk=complaint.location_id).name, "Road Division")
+        self.assertEqual(Complaint.objects.get(pk=complaint.pk).district, "Jumla")
+        self.assertEqual(ComplaintStat.objects.get(office="Road Division").count, 1)
+
+
+class ClaimsAuthenticationTest(OfficeFixtureMixin, AuthEndpointTestCase):
+    admin_scope = {"province": "Bagmati", "district": "Kathmandu"}
+
+    def setUp(self):
+        super().setUp()
+        self.profile = self.admin.profile
+        Complaint.objects.create(user=self.citizen, title="Leak", description="", category="Water", **self.location)
+        # Versions remembered in-process would outlive the rolled back rows
+        self.addCleanup(authentication._local_versions.clear)
+
+    def login(self):
+        response = self.client.post(reverse("token_obtain_pair"), {"username": "officer", "password": "pass1234"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_token_carries_role_and_scope(self):
+        token = AccessToken(self.login()["access"])
+        self.assertEqual(token["role"], "admin")
+        self.assertEqual(token["scope"], ["Bagmati", "Kathmandu", None])
+
+    @override_settings(RESPONSE_CACHE_SECONDS=0)
+    def test_reads_skip_user_and_profile_queries(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()['access']}")
+        self.client.get(reverse("complaint-list"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("complaint-list"))
+        self.assertEqual([row["title"] for row in response.data["results"]], ["Leak"])
+        sql = " ".join(q["sql"] for q in queries)
+        self.assertNotIn('FROM "auth_user"', sql)
+        self.assertNotIn('FROM "complaints_userprofile"', sql)
+        # The version is remembered in-process, so not even the (database) cache is read
+        self.assertNotIn("django_cache", sql)
+
+    def test_scope_change_revokes_tokens(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get(reverse("complaint-list")).status_code, status.HTTP_200_OK)
+
+        self.profile.assigned_district = "Lalitpur"
+        self.profile.save()
+        self.assertEqual(self.client.get(reverse("complaint-list")).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(reverse("token_refresh"), {"refresh": tokens["refresh"]})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()['access']}")
+        response = self.client.get(reverse("complaint-list"))
+        self.assertEqual(response.data["results"], [])
+
+    def test_password_change_revokes_tokens_on_commit(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()['access']}")
+        self.assertEqual(self.client.get(reverse("complaint-list")).status_code, status.HTTP_200_OK)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.admin.set_password("newpass5678")
+            self.admin.save()
+        self.assertEqual(UserProfile.objects.get(pk=self.profile.pk).token_version, 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(UserProfile.objects.get(pk=self.profile.pk).token_version, 1)
+        self.assertEqual(self.client.get(reverse("complaint-list")).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(reverse("complaint-list"), {
+            "title": "Leak", "description": "Pipe burst", "category": "Water", **self.location,
+        })
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class IdentityLoginTest(AuthEndpointTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="sita", email="Sita@Example.com", password="pass1234")
+        UserProfile.objects.create(user=self.user, phone="+977 981-234-5678")
+
+    def login(self, identifier, password="pass1234"):
+        return self.client.post(reverse("token_obtain_pair"), {"username": identifier, "password": password})
+
+    def test_username_email_or_phone_log_in(self):
+        self.assertEqual(UserProfile.objects.get(user=self.user).phone, "9779812345678")
+        for identifier in ("sita", "sita@example.COM", "+977 (981) 2345678", "9779812345678"):
+            response = self.login(identifier)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, identifier)
+            self.assertEqual(str(AccessToken(response.data["access"])["user_id"]), str(self.user.pk))
+        self.assertEqual(self.login("sita@example.com", "wrong").status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_lookup_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(find_user("SITA@example.com"), self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(find_user("+9779812345678"), self.user)
+
+    def test_phone_reset_accepts_any_formatting(self):
+        self.client.post(reverse("forgot_password_phone"), {"phone": "+977-9812345678"})
+        otp = cache.get("otp_phone_9779812345678")
+        response = self.client.post(reverse("verify_otp_phone"), {"phone": "+977 9812 345 678", "otp": otp})
+        response = self.client.post(reverse("reset_password_phone"), {
+            "phone": "+9779812345678", "reset_token": response.data["reset_token"], "new_password": "newpass5678",
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.login("sita", "newpass5678").status_code, status.HTTP_200_OK)
+
+
+class RateLimitTest(AuthEndpointTestCase):
+    limits = {"login": "10/min", "register": "5/hour", "otp_request": "2/min", "otp_verify": "10/hour"}
+
+    def test_exceeding_limit_returns_429_with_retry_after(self):
+        url = reverse("forgot_password")
+        with override_settings(RATE_LIMITS=self.limits):
+            for _ in range(2):
+                self.assertEqual(self.client.post(url, {"email": "nobody@example.com"}).status_code, status.HTTP_200_OK)
+            response = self.client.post(url, {"email": "nobody@example.com"})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertTrue(1 <= int(response["Retry-After"]) <= 120)
+
+    def test_submitted_identity_is_limited_across_addresses(self):
+        url = reverse("forgot_password_phone")
+        with override_settings(RATE_LIMITS=self.limits):
+            codes = [
+                self.client.post(url, {"phone": phone}, REMOTE_ADDR=f"10.0.0.{i}").status_code
+                for i, phone in enumerate(["9812345678", "981-234-5678", "981 234 5678"])
+            ]
+            other = self.client.post(url, {"phone": "9800000000"}, REMOTE_ADDR="10.0.0.9")
+        self.assertEqual(codes, [status.HTTP_200_OK, status.HTTP_200_OK, status.HTTP_429_TOO_MANY_REQUESTS])
+        self.assertEqual(other.status_code, status.HTTP_200_OK)
+
+    def test_window_slides(self):
+        with override_settings(RATE_LIMITS=self.limits):
+            throttle = rate_limit("login")()
+        # Half of the previous window's 10 requests still count
+        self.assertEqual(throttle.estimate(current=0, previous=10, elapsed=30), 5)
+        self.assertEqual(throttle.retry_after(current=5, previous=10, elapsed=6), 30)
+        self.assertLessEqual(throttle.estimate(current=5, previous=10, elapsed=36) + 1, throttle.limit)
+
+    def test_concurrent_requests_cannot_share_a_count(self):
+        request = Request(APIRequestFactory().post("/", {"email": "race@example.com"}, format="json"), parsers=[JSONParser()])
+        request.data
+        with override_settings(RATE_LIMITS=self.limits):
+            throttle_class = rate_limit("otp_request")
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                allowed = list(pool.map(lambda _: throttle_class().allow_request(request, None), range(16)))
+        self.assertEqual(allowed.count(True), 2)
+
+    def test_zero_rate_refuses_without_error(self):
+        with override_settings(RATE_LIMITS={**self.limits, "otp_request": "0/min"}):
+            response = self.client.post(reverse("forgot_password"), {"email": "nobody@example.com"})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "60")
+
+    def test_database_cache_is_refused(self):
+        database_cache = {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "django_cache"}
+        with override_settings(RATE_LIMITS=self.limits, CACHES={**settings.CACHES, "ratelimit": database_cache}):
+            with self.assertRaises(ImproperlyConfigured):
+                rate_limit("login")().allow_request(None, None)
+
+
+class FailingGateway:
+    def send(self, recipient, body):
+        raise ConnectionError("gateway unreachable")
+
+
+class OutboxTest(AuthEndpointTestCase):
+    def test_reset_email_is_queued_not_sent_in_request(self):
+        User.objects.create_user(username="sita", email="sita@example.com", password="pass1234")
+        response = self.client.post(reverse("forgot_password"), {"email": "sita@example.com"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(mail.outbox, [])
+        message = OutboundMessage.objects.get()
+        self.assertEqual((message.channel, message.recipient), (OutboundMessage.EMAIL, "sita@example.com"))
+
+        call_command("process_outbox", "--once", stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(cache.get("otp_sita@example.com"), mail.outbox[0].body)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboundMessage.SENT, 1))
+
+    def test_batch_shares_one_connection(self):
+        for i in range(3):
+            enqueue_email(f"user{i}@example.com", "Hello", "Body")
+        with mock.patch("complaints.outbox.get_connection", wraps=mail.get_connection) as get_connection:
+            self.assertEqual(process_outbox(batch_size=10), (3, 0))
+        get_connection.assert_called_once()
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), [f"user{i}@example.com" for i in range(3)])
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_BASE_SECONDS=30)
+    def test_failed_sms_backs_off_then_gives_up(self):
+        message = enqueue_sms("+9779812345678", "Your OTP")
+        before = timezone.now()
+        self.assertEqual(process_outbox(batch_size=10, gateway=FailingGateway()), (0, 1))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboundMessage.PENDING, 1))
+        self.assertIn("gateway unreachable", message.last_error)
+        self.assertGreaterEqual(message.next_attempt_at, before + timedelta(seconds=30))
+        # Not due yet, so the next pass leaves it alone
+        self.assertEqual(process_outbox(batch_size=10, gateway=FailingGateway()), (0, 0))
+
+        OutboundMessage.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+        process_outbox(batch_size=10, gateway=FailingGateway())
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboundMessage.FAILED, 2))
+
+    def test_claimed_messages_are_leased(self):
+        for i in range(3):
+            enqueue_sms(f"98000000{i:02d}", "Hi")
+        first = claim_batch(2)
+        second = claim_batch(2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(claim_batch(2), [])
+        self.assertEqual(deliver_batch(first + second, gateway=mock.Mock()), (3, 0))
+
+
+class NotificationDigestTest(APITestCase):
+    location = LOCATION
+
+    def setUp(self):
+        self.admin = make_admin(**self.location)
+        self.client.force_authenticate(self.admin)
+        self.complaints = {}
+        for name, count in (("sita", 3), ("ram", 2)):
+            citizen = make_user(name)
+            self.complaints[name] = [
+                Complaint.objects.create(user=citizen, title=f"{name} {i}", description="", category="Water", **self.location)
+                for i in range(count)
+            ]
+
+    @override_settings(NOTIFICATION_DIGEST_SECONDS=0)
+    def test_bulk_triage_sends_one_email_per_citizen(self):
+        payload = [
+            {"id": complaint.id, "status": "In Progress", "remarks": "Crew sent"}
+            for complaints in self.complaints.values() for complaint in complaints
+        ]
+        response = self.client.post(reverse("complaint-bulk-update"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(ComplaintNotification.objects.count(), 5)
+        self.assertEqual(mail.outbox, [])
+
+        call_command("process_outbox", "--once", stdout=io.StringIO())
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), ["ram@example.com", "sita@example.com"])
+        sita = next(email for email in mail.outbox if email.to == ["sita@example.com"])
+        self.assertEqual(sita.subject, "Updates on 3 of your complaints")
+        self.assertEqual(sita.body.count("In Progress"), 3)
+        self.assertFalse(ComplaintNotification.objects.exists())
+
+    @override_settings(NOTIFICATION_DIGEST_SECONDS=600)
+    def test_changes_coalesce_until_window_closes(self):
+        complaint = self.complaints["sita"][0]
+        url = reverse("complaint-detail", args=[complaint.id])
+        self.client.patch(url, {"status": "In Progress"}, format="json")
+        self.client.patch(url, {"status": "Resolved", "remarks": "Fixed"}, format="json")
+        # Re-sending the same values is not news
+        self.client.patch(url, {"remarks": "Fixed"}, format="json")
+        self.assertEqual(ComplaintNotification.objects.count(), 2)
+        self.assertEqual(queue_digests(batch_size=10), 0)
+
+        ComplaintNotification.objects.update(created_at=timezone.now() - timedelta(minutes=11))
+        self.assertEqual(queue_digests(batch_size=10), 1)
+        message = OutboundMessage.objects.get()
+        self.assertEqual(message.subject, "Update on your complaint: sita 0")
+        self.assertIn("Resolved", message.body)
+        self.assertIn("Remarks: Fixed", message.body)
+        self.assertNotIn("In Progress", message.body)
+
+
+class BootstrapTest(OfficeFixtureMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.complaints = [
+            Complaint.objects.create(user=self.citizen, title=f"C{i}", description="", category="Water", **self.location)
+            for i in range(3)
+        ]
+        self.url = reverse("bootstrap")
+
+    def test_one_response_for_first_paint(self):
+        self.client.force_authenticate(self.citizen)
+        response = self.client.get(self.url, {"page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["profile"], self.client.get(reverse("me")).data)
+        self.assertEqual([c["title"] for c in response.data["complaints"]["results"]], ["C2", "C1"])
+        self.assertIn(reverse("complaint-list") + "?", response.data["complaints"]["next"])
+        self.assertEqual(response.data["counts"]["total"], 3)
+        self.assertEqual(response.data["counts"]["by_status"]["Pending"], 3)
+        self.assertEqual(response.data["locations_version"], get_location_index().etag.strip('"'))
+        # No write path: the missing profile is not created
+        self.assertFalse(UserProfile.objects.filter(user=self.citizen).exists())
+
+    def test_revalidates_until_something_changes(self):
+        self.client.force_authenticate(self.citizen)
+        etag = self.client.get(self.url)["ETag"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.force_authenticate(self.admin)
+        self.client.patch(reverse("complaint-detail", args=[self.complaints[0].id]), {"status": "In Progress"})
+        self.client.force_authenticate(self.citizen)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["counts"]["by_status"]["In Progress"], 1)
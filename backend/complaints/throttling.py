@@ -0,0 +1,143 @@
+"""Sliding-window rate limits for the unauthenticated auth endpoints.
+
+Each limited endpoint names a scope in ``settings.RATE_LIMITS`` (DRF rate
+syntax, e.g. ``"10/min"``). A request is counted against the client's
+address and against every email, phone number or login identifier it
+submits, so neither rotating addresses nor rotating accounts gets around the
+limit. Exceeding any of them returns 429 with ``Retry-After``.
+
+Counters live in the ``ratelimit`` cache, one per identity and fixed window.
+The request rate is estimated from the current window plus the previous one,
+weighted by how much of it still overlaps the sliding window. Each request
+first increments its current counters and then compares the returned values,
+so concurrent requests can never all read the same count and slip through
+together. That needs a cache whose ``incr`` is atomic; the database cache's
+is a read followed by a write, so it is refused. The cost is one ``get_many``
+and one ``incr`` per identity, every request counting, refused ones too.
+"""
+
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import BaseThrottle
+
+from .backends import PHONE_RE, normalize_email
+from .models import normalize_phone
+
+PREFIX = "ratelimit"
+IDENTITY_FIELDS = ("username", "email", "phone")
+CACHE_ALIAS = "ratelimit"
+# Backends whose incr() is a single atomic operation
+ATOMIC_INCR_BACKENDS = (
+    "django.core.cache.backends.redis.RedisCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.memcached.PyMemcacheCache",
+    "django.core.cache.backends.memcached.PyLibMCCache",
+)
+# Seconds per period, keyed by the first letter as in DRF's rate syntax
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """``(limit, window seconds)`` for a rate such as ``"10/min"``; ``(None, None)`` for no rate."""
+    if not rate:
+        return None, None
+    count, period = rate.split("/")
+    return int(count), PERIODS[period.strip()[0]]
+
+
+def counter_cache():
+    backend = settings.CACHES[CACHE_ALIAS]["BACKEND"]
+    if backend not in ATOMIC_INCR_BACKENDS:
+        raise ImproperlyConfigured(
+            f"CACHES[{CACHE_ALIAS!r}] uses {backend}, whose incr() is not atomic; "
+            "rate limiting needs Redis, memcached or local memory"
+        )
+    return caches[CACHE_ALIAS]
+
+
+def _normalize(value):
+    value = str(value).strip()
+    if "@" in value:
+        return normalize_email(value)
+    if PHONE_RE.match(value):
+        return normalize_phone(value) or value
+    return value
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    scope = None
+
+    def __init__(self):
+        # An empty rate turns the limit off
+        self.limit, self.window = parse_rate(settings.RATE_LIMITS.get(self.scope))
+        self.wait_seconds = None
+
+    def identities(self, request):
+        identities = {f"ip:{self.get_ident(request)}"}
+        data = request.data if hasattr(request.data, "get") else {}
+        for field in IDENTITY_FIELDS:
+            value = data.get(field)
+            if value and isinstance(value, str):
+                identities.add(f"id:{_normalize(value)}")
+        return sorted(identities)
+
+    def _key(self, identity, window_index):
+        digest = hashlib.sha256(identity.encode()).hexdigest()[:32]
+        return f"{PREFIX}:{self.scope}:{digest}:{window_index}"
+
+    def estimate(self, current, previous, elapsed):
+        return current + previous * (1 - elapsed / self.window)
+
+    def retry_after(self, current, previous, elapsed):
+        """Seconds until one more request fits under the limit, assuming no others arrive."""
+        window, allowance = self.window, self.limit - 1
+        if current <= allowance:
+            # Only the previous window's decaying share is in the way (so previous > 0)
+            return window * (1 - (allowance - current) / previous) - elapsed
+        # Wait for this window to end, then for its share to decay far enough
+        return window - elapsed + window * (1 - allowance / current)
+
+    def allow_request(self, request, view):
+        if self.limit is None:
+            return True
+        if self.limit == 0:
+            self.wait_seconds = self.window
+            return False
+        cache = counter_cache()
+        now = time.time()
+        window_index, elapsed = divmod(now, self.window)
+        window_index = int(window_index)
+        keys = [
+            (self._key(identity, window_index), self._key(identity, window_index - 1))
+            for identity in self.identities(request)
+        ]
+        previous_counts = cache.get_many([previous_key for _, previous_key in keys])
+
+        waits = []
+        for current_key, previous_key in keys:
+            # Count first, then judge by the count this request got
+            try:
+                current = cache.incr(current_key)
+            except ValueError:
+                # First request of the window; it lives two windows, as the next one still reads it
+                current = 1 if cache.add(current_key, 1, self.window * 2) else cache.incr(current_key)
+            previous = previous_counts.get(previous_key, 0)
+            if self.estimate(current - 1, previous, elapsed) + 1 > self.limit:
+                waits.append(self.retry_after(current, previous, elapsed))
+        if waits:
+            self.wait_seconds = max(1, math.ceil(max(waits)))
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+def rate_limit(scope):
+    """Throttle class for ``throttle_classes`` limiting a view by ``RATE_LIMITS[scope]``."""
+    return type(f"{scope.title().replace('_', '')}Throttle", (SlidingWindowThrottle,), {"scope": scope})
@@ -0,0 +1,76 @@
+"""Race-free status/remarks changes for a single complaint.
+
+``apply_transition`` checks the move against ``STATUS_TRANSITIONS`` and then
+writes it as one ``UPDATE ... WHERE id = %s AND status = <status the caller
+loaded>``. Only ``status``, ``remarks`` and ``updated_at`` are written. If
+another admin changed the status in the meantime, nothing matches and
+``TransitionConflict`` (409) is raised instead of overwriting their change.
+A change that alters the status or remarks is also appended to
+``ComplaintStatusChange`` and queues a notification for the citizen.
+"""
+
+from django.db import router, transaction
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+from . import response_cache, stats
+from .events import COMPLAINT_STATUS_CHANGED, publish_complaint_event
+from .models import STATUS_TRANSITIONS, Complaint, ComplaintStatusChange
+from .notifications import notify_citizens
+
+TRANSITION_FIELDS = ("status", "remarks")
+
+
+class TransitionConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This complaint was changed by someone else; reload it and try again."
+    default_code = "conflict"
+
+
+def transition_error(current_status, new_status):
+    """Return why ``current_status -> new_status`` is not allowed, or None."""
+    if new_status != current_status and new_status not in STATUS_TRANSITIONS.get(current_status, ()):
+        return f"Cannot change {current_status} to {new_status}"
+    return None
+
+
+def apply_transition(complaint, changes, actor=None, using=None):
+    """Apply ``changes`` (``status`` and/or ``remarks``) to ``complaint`` in place.
+
+    If anything changed, a ``ComplaintStatusChange`` row is appended in the same transaction.
+    """
+    expected_status = complaint.status
+    new_status = changes.get("status", expected_status)
+    error = transition_error(expected_status, new_status)
+    if error:
+        raise serializers.ValidationError({"status": error})
+
+    values = {field: changes[field] for field in TRANSITION_FIELDS if field in changes}
+    values["updated_at"] = timezone.now()
+    using = using or router.db_for_write(Complaint, instance=complaint)
+    with transaction.atomic(using=using):
+        matched = (
+            Complaint.objects.using(using)
+            .filter(pk=complaint.pk, status=expected_status)
+            .update(**values)
+        )
+        if not matched:
+            raise TransitionConflict()
+
+        old_key = complaint.stat_key()
+        previous = (complaint.status, complaint.remarks)
+        for field, value in values.items():
+            setattr(complaint, field, value)
+        # .update() skips the model signals, so keep counters and events in step here
+        complaint._loaded_stat_key = complaint.stat_key()
+        complaint._loaded_remarks = complaint.remarks
+        stats.move(old_key, complaint._loaded_stat_key, using=using)
+        response_cache.invalidate_complaints([response_cache.complaint_row(complaint)], using=using)
+        if new_status != expected_status:
+            publish_complaint_event(COMPLAINT_STATUS_CHANGED, complaint, previous_status=expected_status, using=using)
+        # History and notifications only for real changes, as for full saves and bulk updates
+        if (complaint.status, complaint.remarks) != previous:
+            ComplaintStatusChange.for_complaint(complaint, expected_status, getattr(actor, "pk", None)).save(using=using)
+            notify_citizens([complaint], using=using)
+    return complaint
@@ -1,5 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
+from . import async_views
+from .streams import complaint_events, stream_ticket
 from .views import (
     ComplaintViewSet,
     register,
@@ -7,6 +10,7 @@ from .views import (
     verify_otp,
     reset_password,
     me,
+    bootstrap,
     forgot_password_phone,
     verify_otp_phone,
     reset_password_phone,
@@ -18,6 +22,7 @@ router.register(r"complaints", ComplaintViewSet, basename="complaint")
 
 urlpatterns = [
     path("me/", me, name="me"),
+    path("bootstrap/", bootstrap, name="bootstrap"),
     path("auth/register/", register, name="register"),
     path("auth/forgot-password/", forgot_password, name="forgot_password"),
     path("auth/verify-otp/", verify_otp, name="verify_otp"),
@@ -26,5 +31,17 @@ urlpatterns = [
     path("auth/verify-otp-phone/", verify_otp_phone, name="verify_otp_phone"),
     path("auth/reset-password-phone/", reset_password_phone, name="reset_password_phone"),
     path("locations/", locations, name="locations"),
+    # Must precede the router, whose complaint detail route would match "events"
+    path("complaints/events/", complaint_events, name="complaint_events"),
+    path("complaints/events/ticket/", stream_ticket, name="complaint_events_ticket"),
     path("", include(router.urls)),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    # Async GET handlers shadow the DRF views; other methods fall through to them
+    urlpatterns = [
+        path("me/", async_views.me, name="me"),
+        path("locations/", async_views.locations, name="locations"),
+        path("complaints/", async_views.complaint_list, name="complaint-list"),
+        path("complaints/<int:pk>/", async_views.complaint_detail, name="complaint-detail"),
+    ] + urlpatterns
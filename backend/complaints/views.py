@@ -1,48 +1,261 @@
 from rest_framework import permissions, status, viewsets
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.cache import cache
-from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from itertools import chain
 import random
 import string
-from .models import Complaint, UserProfile
-from .serializers import ComplaintSerializer, UserSerializer
-from .locations import LOCATION_DATA, get_districts, get_offices, get_provinces
+from . import response_cache
+from .archive import wants_archive
+from .authentication import db_user
+from .backends import normalize_email, users_by_email
+from .bulk import bulk_update_complaints
+from .conditional import make_etag, not_modified, set_validators
+from .export import EXPORT_FORMATS, stream_export
+from .filters import ComplaintFilterBackend
+from .offices import directory as office_directory
+from .notifications import notify_citizens
+from .outbox import enqueue_email, enqueue_sms
+from .models import (
+    ArchivedComplaint,
+    Complaint,
+    ComplaintStat,
+    ComplaintStatusChange,
+    ComplaintTombstone,
+    UserProfile,
+    normalize_phone,
+)
+from .pagination import ComplaintCursorPagination, StatusChangePagination, complaint_paginator
+from .permissions import get_profile, is_admin, scope_queryset
+from .serializers import ComplaintSerializer, ComplaintStatusChangeSerializer, UserSerializer
+from .stats import summarize
+from .sync import changes_since
+from .throttling import rate_limit
+from .transitions import apply_transition
+from .locations import get_index as get_location_index
+
+
+def complaint_list_etag(request, scope, last_deleted):
+    return make_etag(
+        "complaints", request.user.pk, scope["count"], scope["last"], last_deleted, request.get_full_path()
+    )
+
+
+def profile_payload(user, profile):
+    """Body of ``me/`` for ``user`` and their (possibly missing) profile."""
+    full_name = (f"{user.first_name} {user.last_name}".strip()) or user.email
+    return {
+        "id": user.id,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "full_name": full_name,
+        "role": getattr(profile, "role", "user"),
+        "assigned_province": getattr(profile, "assigned_province", ""),
+        "assigned_district": getattr(profile, "assigned_district", ""),
+        "assigned_office": getattr(profile, "assigned_office", ""),
+    }
+
+
+# Columns the complaint serializer reads, including the author's username
+COMPLAINT_LIST_FIELDS = (
+    "id",
+    "user",
+    "user__username",
+    "title",
+    "description",
+    "category",
+    # province/district/office are read from the in-memory office directory
+    "location",
+    "remarks",
+    "status",
+    "created_at",
+    "updated_at",
+)
 
 
 class ComplaintViewSet(viewsets.ModelViewSet):
     serializer_class = ComplaintSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ComplaintCursorPagination
+    filter_backends = [ComplaintFilterBackend]
+
+    def complaint_model(self):
+        """``ArchivedComplaint`` for ``?archived=true`` lists and exports, else ``Complaint``."""
+        if self.action in ("list", "export") and wants_archive(self.request.query_params):
+            return ArchivedComplaint
+        return Complaint
+
+    @property
+    def paginator(self):
+        # Searches page by offset over rank; everything else by cursor
+        if not hasattr(self, "_paginator"):
+            self._paginator = complaint_paginator(self.request.query_params)
+        return self._paginator
 
     def get_queryset(self):
-        user = self.request.user
-        profile = getattr(user, "profile", None)
-
-        # Admins only see complaints matching their assigned location (if set)
-        if user.is_staff or getattr(profile, "role", "user") == "admin":
-            queryset = Complaint.objects.all()
-            filters = {}
-            if profile:
-                if profile.assigned_province:
-                    filters["province"] = profile.assigned_province
-                if profile.assigned_district:
-                    filters["district"] = profile.assigned_district
-                if profile.assigned_office:
-                    filters["office"] = profile.assigned_office
-            if filters:
-                queryset = queryset.filter(**filters)
-            return queryset.order_by("-created_at")
-
-        # End users only see their own complaints
-        return Complaint.objects.filter(user=user).order_by("-created_at")
+        queryset = self.complaint_model().objects.select_related("user").only(*COMPLAINT_LIST_FIELDS)
+        return scope_queryset(self.request, queryset).newest_first()
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if self.request.method not in permissions.SAFE_METHODS:
+                raise
+        # Closed complaints may have moved to the archive; they stay readable
+        queryset = ArchivedComplaint.objects.select_related("user").only(*COMPLAINT_LIST_FIELDS)
+        instance = get_object_or_404(scope_queryset(self.request, queryset), pk=self.kwargs["pk"])
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    def list_validators(self, request):
+        """Cheap ETag/Last-Modified for the caller's scope, without loading any rows."""
+        model = self.complaint_model()
+        scope = scope_queryset(request, model.objects.all()).aggregate(count=Count("id"), last=Max("updated_at"))
+        last_deleted = scope_queryset(request, ComplaintTombstone.objects.all()).aggregate(last=Max("id"))["last"]
+        return complaint_list_etag(request, scope, last_deleted), scope["last"]
+
+    def list(self, request, *args, **kwargs):
+        cache_key = response_cache.list_cache_key(request)
+        cached = cache.get(cache_key) if cache_key else None
+        if cached:
+            etag, last_modified, data = cached
+            return set_validators(not_modified(request, etag, last_modified) or Response(data), etag, last_modified)
+
+        etag, last_modified = self.list_validators(request)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+            if cache_key and response.status_code == status.HTTP_200_OK:
+                cache.set(cache_key, (etag, last_modified, response.data), settings.RESPONSE_CACHE_SECONDS)
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = make_etag("complaint", request.user.pk, instance.pk, instance.updated_at)
+        response = not_modified(request, etag, instance.updated_at)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return set_validators(response, etag, instance.updated_at)
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        """Complaints created/updated and ids deleted since ``?since=<token>``.
+
+        Clients apply ``changes`` (upserts) before ``deleted`` and keep calling
+        with ``next`` until ``has_more`` is false. Omit ``since`` for a full sync.
+        """
+        limit = self.paginator.get_page_size(request)
+        tombstones = scope_queryset(request, ComplaintTombstone.objects.all())
+        rows, deleted, next_token, has_more = changes_since(
+            self.get_queryset(), tombstones, request.query_params.get("since", ""), limit
+        )
+        return Response({
+            "changes": self.get_serializer(rows, many=True).data,
+            "deleted": deleted,
+            "next": next_token,
+            "has_more": has_more,
+        })
+
+    def stats_rows(self, request):
+        """``(office, category, status, count)`` rows for the caller's scope, for ``summarize``."""
+        if is_admin(request):
+            rows = scope_queryset(request, ComplaintStat.objects.filter(count__gt=0))
+            return rows.values_list("office", "category", "status", "count")
+        # A citizen's own complaints are few; group them directly, archive included
+        return (
+            (office_directory.names(location_id)[2], category, complaint_status, total)
+            for location_id, category, complaint_status, total in chain.from_iterable(
+                model.objects.filter(user_id=request.user.pk)
+                .order_by()
+                .values("location_id", "category", "status")
+                .annotate(total=Count("id"))
+                .values_list("location_id", "category", "status", "total")
+                for model in (Complaint, ArchivedComplaint)
+            )
+        )
+
+    @action(detail=False, methods=["get"])
+    def stats(self, request):
+        """Complaint counts by status, category and office for the caller's scope."""
+        return Response(summarize(self.stats_rows(request)))
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """Stream every complaint in scope (after filters) as ``?as=csv`` or ``?as=ndjson``."""
+        export_format = request.query_params.get("as", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"Unsupported export format; use one of {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        return stream_export(queryset, export_format, settings.COMPLAINT_EXPORT_CHUNK_SIZE)
+
+    def history_response(self, rows, **extra):
+        actor_ids = {row.actor_id for row in rows if row.actor_id}
+        actor_names = dict(User.objects.filter(pk__in=actor_ids).values_list("pk", "username")) if actor_ids else {}
+        data = ComplaintStatusChangeSerializer(rows, many=True, context={"actor_names": actor_names}).data
+        return {**extra, "results": data}
+
+    @action(detail=True, methods=["get"])
+    def timeline(self, request, pk=None):
+        """Every status/remarks change of one complaint, oldest first."""
+        complaint = self.get_object()
+        rows = list(ComplaintStatusChange.objects.filter(complaint_id=complaint.pk).order_by("created_at", "id"))
+        return Response(self.history_response(rows, complaint=complaint.pk, created_at=complaint.created_at))
+
+    @action(detail=False, methods=["get"])
+    def activity(self, request):
+        """Status/remarks changes across the admin's office, newest first, cursor-paginated."""
+        if not is_admin(request):
+            return Response({"detail": "Admin only"}, status=status.HTTP_403_FORBIDDEN)
+        paginator = StatusChangePagination()
+        rows = paginator.paginate_queryset(scope_queryset(request, ComplaintStatusChange.objects.all()), request, view=self)
+        return Response(
+            self.history_response(rows, next=paginator.get_next_link(), previous=paginator.get_previous_link())
+        )
+
+    @action(detail=False, methods=["post"], url_path="bulk-update")
+    def bulk_update(self, request):
+        """Apply ``[{id, status, remarks}, ...]`` in one transaction, reporting per item."""
+        if not is_admin(request):
+            return Response({"detail": "Admin only"}, status=status.HTTP_403_FORBIDDEN)
+
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "Expected a non-empty list of updates"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.COMPLAINT_BULK_UPDATE_MAX:
+            return Response(
+                {"detail": f"At most {settings.COMPLAINT_BULK_UPDATE_MAX} updates per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = bulk_update_complaints(scope_queryset(request, Complaint.objects.all()), items, actor=request.user)
+        return Response({"results": results})
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user, status="Pending")
 
+    def perform_update(self, serializer):
+        previous = (serializer.instance.status, serializer.instance.remarks)
+        # Credited in the history row the save signal writes
+        serializer.instance._history_actor_id = self.request.user.pk
+        with transaction.atomic(using=serializer.instance._state.db):
+            complaint = serializer.save()
+            if (complaint.status, complaint.remarks) != previous:
+                notify_citizens([complaint], using=complaint._state.db)
+
     def partial_update(self, request, *args, **kwargs):
-        role = getattr(getattr(request.user, "profile", None), "role", "user")
-        if not (request.user.is_staff or role == "admin"):
+        if not is_admin(request):
             return Response({"detail": "Admin only"}, status=status.HTTP_403_FORBIDDEN)
 
         # Allow admins to change status and remarks only
@@ -51,36 +264,93 @@ class ComplaintViewSet(viewsets.ModelViewSet):
         if extra_fields:
             return Response({"detail": "Only status and remarks can be updated"}, status=status.HTTP_400_BAD_REQUEST)
 
-        return super().partial_update(request, *args, **kwargs)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        # One conditional UPDATE of status/remarks; 409 if the status moved underneath us
+        apply_transition(instance, serializer.validated_data, actor=request.user)
+        return Response(self.get_serializer(instance).data)
 
     def update(self, request, *args, **kwargs):
-        role = getattr(getattr(request.user, "profile", None), "role", "user")
-        if not (request.user.is_staff or role == "admin"):
+        if not is_admin(request):
             return Response({"detail": "Admin only"}, status=status.HTTP_403_FORBIDDEN)
         return super().update(request, *args, **kwargs)
 
 
+def cached_profile_payload(request):
+    """The caller's ``me/`` payload, from the per-user cache when possible. Never writes."""
+    cache_key = response_cache.me_cache_key(request.user.pk)
+    payload = cache.get(cache_key) if response_cache.enabled() else None
+    if payload is None:
+        # Claim-built users only carry an id; the payload needs the real row
+        user = db_user(request.user)
+        # Claims or one read, shared with the scope checks; a missing profile reads as a citizen
+        payload = profile_payload(user, get_profile(request))
+        if response_cache.enabled():
+            cache.set(cache_key, payload, settings.RESPONSE_CACHE_SECONDS)
+    return payload
+
+
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
 def me(request):
-    user = request.user
-    full_name = (f"{user.first_name} {user.last_name}".strip()) or user.email
-    profile, _ = UserProfile.objects.get_or_create(user=user)
-    return Response({
-        "id": user.id,
-        "email": user.email,
-        "first_name": user.first_name,
-        "last_name": user.last_name,
-        "full_name": full_name,
-        "role": getattr(profile, "role", "user"),
-        "assigned_province": getattr(profile, "assigned_province", ""),
-        "assigned_district": getattr(profile, "assigned_district", ""),
-        "assigned_office": getattr(profile, "assigned_office", ""),
-    })
+    payload = cached_profile_payload(request)
+    etag = make_etag("me", *payload.values())
+    response = not_modified(request, etag)
+    if response is None:
+        response = Response(payload)
+    return set_validators(response, etag)
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def bootstrap(request):
+    """Everything a page needs for first paint, in one response.
+
+    The caller's profile (as ``me/``), the first page of their complaint list
+    (``?page_size=`` as for ``complaints/``; ``next`` continues there), their
+    per-status counts (as ``complaints/stats/``) and the location catalog
+    version. The ETag is built from the same cheap validators as the list's,
+    so unchanged data answers 304, and built payloads are cached per user
+    under that ETag.
+    """
+    view = ComplaintViewSet(request=request, args=(), kwargs={}, format_kwarg=None, action="list")
+    profile = cached_profile_payload(request)
+    list_etag, _ = view.list_validators(request)
+    locations_version = get_location_index().etag.strip('"')
+    etag = make_etag("bootstrap", list_etag, locations_version, *profile.values())
+    response = not_modified(request, etag)
+    if response is not None:
+        return set_validators(response, etag)
+
+    cache_key = response_cache.bootstrap_cache_key(request.user.pk, etag) if response_cache.enabled() else None
+    payload = cache.get(cache_key) if cache_key else None
+    if payload is None:
+        paginator = ComplaintCursorPagination()
+        page = paginator.paginate_queryset(view.get_queryset(), request, view=view)
+        # Later pages come from the complaint list itself
+        paginator.base_url = request.build_absolute_uri(reverse("complaint-list"))
+        if request.query_params:
+            paginator.base_url += "?" + request.query_params.urlencode()
+        counts = summarize(view.stats_rows(request))
+        payload = {
+            "profile": profile,
+            "complaints": {
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
+                "results": view.get_serializer(page, many=True).data,
+            },
+            "counts": {"total": counts["total"], "by_status": counts["by_status"]},
+            "locations_version": locations_version,
+        }
+        if cache_key:
+            cache.set(cache_key, payload, settings.RESPONSE_CACHE_SECONDS)
+    return set_validators(Response(payload), etag)
 
 
 @api_view(["POST"])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([rate_limit("register")])
 def register(request):
     serializer = UserSerializer(data=request.data)
     if serializer.is_valid():
@@ -97,6 +367,7 @@ def register(request):
 
 @api_view(["POST"])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([rate_limit("otp_request")])
 def forgot_password(request):
     """Generate and send OTP for password reset (email)"""
     email = request.data.get("email")
@@ -107,9 +378,9 @@ def forgot_password(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    try:
-        user = User.objects.get(email=email)
-    except User.DoesNotExist:
+    email = normalize_email(email)
+    user = users_by_email(email).first()
+    if user is None:
         # Don't reveal if email exists or not for security
         return Response(
             {"detail": "If email exists, OTP will be sent"}, 
@@ -122,20 +393,12 @@ def forgot_password(request):
     # Store OTP in cache for 10 minutes
     cache.set(f"otp_{email}", otp, 600)
     
-    # In production, send via email. For now, we'll print it
-    print(f"Email OTP for {email}: {otp}")
-    
-    # Try to send email (will fail in development without email config)
-    try:
-        send_mail(
-            "Password Reset OTP",
-            f"Your OTP for password reset is: {otp}\n\nThis OTP will expire in 10 minutes.",
-            "noreply@dcms.com",
-            [email],
-            fail_silently=True,
-        )
-    except:
-        pass
+    # Delivered by the outbox worker, so a slow or unreachable mail server never delays the response
+    enqueue_email(
+        email,
+        "Password Reset OTP",
+        f"Your OTP for password reset is: {otp}\n\nThis OTP will expire in 10 minutes.",
+    )
     
     return Response(
         {"detail": "OTP sent to email", "email": email}, 
@@ -145,6 +408,7 @@ def forgot_password(request):
 
 @api_view(["POST"])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([rate_limit("otp_verify")])
 def verify_otp(request):
     """Verify OTP and return reset token (email)"""
     email = request.data.get("email")
@@ -155,6 +419,7 @@ def verify_otp(request):
             {"detail": "Email and OTP are required"}, 
             status=status.HTTP_400_BAD_REQUEST
         )
+    email = normalize_email(email)
     
     stored_otp = cache.get(f"otp_{email}")
     
@@ -197,6 +462,7 @@ def reset_password(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    email = normalize_email(email)
     stored_token = cache.get(f"reset_token_{email}")
     
     if not stored_token or stored_token != reset_token:
@@ -205,38 +471,36 @@ def reset_password(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    try:
-        user = User.objects.get(email=email)
-        user.set_password(new_password)
-        user.save()
-        
-        # Clear reset token after use
-        cache.delete(f"reset_token_{email}")
-        
-        return Response(
-            {"detail": "Password reset successfully"}, 
-            status=status.HTTP_200_OK
-        )
-    except User.DoesNotExist:
+    user = users_by_email(email).first()
+    if user is None:
         return Response(
             {"detail": "User not found"}, 
             status=status.HTTP_404_NOT_FOUND
         )
+    user.set_password(new_password)
+    user.save()
+    
+    # Clear reset token after use
+    cache.delete(f"reset_token_{email}")
+    
+    return Response(
+        {"detail": "Password reset successfully"}, 
+        status=status.HTTP_200_OK
+    )
 
 
 @api_view(["POST"])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([rate_limit("otp_request")])
 def forgot_password_phone(request):
     """Generate and send OTP for password reset (phone)"""
     phone = request.data.get("phone")
 
-    if not phone:
+    if not normalize_phone(phone):
         return Response({"detail": "Phone is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        profile = UserProfile.objects.get(phone=phone)
-        user = profile.user
-    except UserProfile.DoesNotExist:
+    phone = normalize_phone(phone)
+    if not UserProfile.objects.filter(phone=phone).exists():
         # Don't reveal if phone exists
         return Response({"detail": "If phone exists, OTP will be sent"}, status=status.HTTP_200_OK)
 
@@ -246,19 +510,20 @@ def forgot_password_phone(request):
     # Store OTP in cache for 10 minutes
     cache.set(f"otp_phone_{phone}", otp, 600)
 
-    # In production, send via SMS provider. For now, print it.
-    print(f"SMS OTP for {phone}: {otp}")
+    enqueue_sms(phone, f"Your DCMS password reset OTP is {otp}. It expires in 10 minutes.")
 
     return Response({"detail": "OTP sent to phone", "phone": phone}, status=status.HTTP_200_OK)
 
 
 @api_view(["POST"])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([rate_limit("otp_verify")])
 def verify_otp_phone(request):
     """Verify phone OTP and return reset token"""
     phone = request.data.get("phone")
     otp = request.data.get("otp")
 
+    phone = normalize_phone(phone)
     if not phone or not otp:
         return Response({"detail": "Phone and OTP are required"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -286,6 +551,7 @@ def reset_password_phone(request):
     reset_token = request.data.get("reset_token")
     new_password = request.data.get("new_password")
 
+    phone = normalize_phone(phone)
     if not all([phone, reset_token, new_password]):
         return Response({"detail": "Phone, reset token, and new password are required"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -294,25 +560,28 @@ def reset_password_phone(request):
     if not stored_token or stored_token != reset_token:
         return Response({"detail": "Invalid or expired reset token"}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        profile = UserProfile.objects.get(phone=phone)
-        user = profile.user
-        user.set_password(new_password)
-        user.save()
+    # One indexed query: the profile's phone and the user row together
+    profile = UserProfile.objects.select_related("user").filter(phone=phone).first()
+    if profile is None:
+        return Response({"detail": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+    user = profile.user
+    user.set_password(new_password)
+    user.save()
 
-        cache.delete(f"reset_token_phone_{phone}")
+    cache.delete(f"reset_token_phone_{phone}")
 
-        return Response({"detail": "Password reset successfully"}, status=status.HTTP_200_OK)
-    except UserProfile.DoesNotExist:
-        return Response({"detail": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response({"detail": "Password reset successfully"}, status=status.HTTP_200_OK)
+
+
+LOCATIONS_MAX_AGE = 60 * 60 * 24
 
 
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
 def locations(request):
-    """Return static Nepal location data (province → district → offices)."""
-    return Response({
-        "provinces": get_provinces(),
-        "districts": {province: get_districts(province) for province in get_provinces()},
-        "offices": LOCATION_DATA,
-    })
+    """Return Nepal location data (province → district → offices), pre-serialized."""
+    index = get_location_index()
+    response = not_modified(request, index.etag)
+    if response is None:
+        response = HttpResponse(index.body, content_type="application/json")
+    return set_validators(response, index.etag, private=False, max_age=LOCATIONS_MAX_AGE)
@@ -0,0 +1,99 @@
+"""Primary/replica database routing.
+
+Enabled when ``DATABASE_REPLICA_URLS`` is set (see settings). Writes always go
+to ``default`` (the primary). Reads go to a replica, except:
+
+* during any non-GET/HEAD/OPTIONS request, so a write and the reads around it
+  see the same data, and
+* for ``DATABASE_REPLICA_STICKY_SECONDS`` after a client's last write, so they
+  read their own writes while the replicas catch up.
+
+Clients are recognised by their bearer token and their address; either one
+having written recently is enough to stick to the primary. The marker lives in
+the default cache, so it is shared between workers once that cache is.
+"""
+
+import hashlib
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+PRIMARY = "default"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+STICKY_PREFIX = "db-sticky:"
+
+# Outside a request (management commands, background pollers) reads stay on the primary
+_use_primary = ContextVar("use_primary", default=True)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        # The database cache backend holds OTPs and invalidation markers; never read it stale
+        if not replicas or _use_primary.get() or model._meta.app_label == "django_cache":
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication
+        return db == PRIMARY
+
+
+def _client_keys(request):
+    keys = []
+    authorization = request.META.get("HTTP_AUTHORIZATION")
+    if authorization:
+        keys.append(STICKY_PREFIX + hashlib.sha256(authorization.encode()).hexdigest())
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    address = forwarded.split(",")[0].strip() or request.META.get("REMOTE_ADDR")
+    if address:
+        keys.append(STICKY_PREFIX + address)
+    return keys
+
+
+class ReplicaRoutingMiddleware:
+    """Decide per request whether reads may use a replica (see module docstring)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        keys = _client_keys(request)
+        writing = request.method not in SAFE_METHODS
+        token = _use_primary.set(writing or bool(keys and cache.get_many(keys)))
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+        if writing:
+            cache.set_many(dict.fromkeys(keys, True), settings.DATABASE_REPLICA_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        keys = _client_keys(request)
+        writing = request.method not in SAFE_METHODS
+        token = _use_primary.set(writing or bool(keys and await cache.aget_many(keys)))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+        if writing:
+            await cache.aset_many(dict.fromkeys(keys, True), settings.DATABASE_REPLICA_STICKY_SECONDS)
+        return response
@@ -4,29 +4,21 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from django.contrib.auth.models import User
+from complaints.authentication import ScopedTokenObtainPairSerializer, ScopedTokenRefreshSerializer
+from complaints.throttling import rate_limit
 
 
 class AllowAnyTokenObtainPairView(TokenObtainPairView):
     permission_classes = (AllowAny,)
-    
-    def post(self, request, *args, **kwargs):
-        # Allow login with either username or email
-        username = request.data.get('username')
-        
-        # If it looks like an email, try to find the user by email
-        if username and '@' in username:
-            try:
-                user = User.objects.get(email=username)
-                request.data['username'] = user.username
-            except User.DoesNotExist:
-                pass
-        
-        return super().post(request, *args, **kwargs)
+    throttle_classes = (rate_limit("login"),)
+    # Role and scope ride along in the token so reads skip the user lookups
+    serializer_class = ScopedTokenObtainPairSerializer
+    # "username" may also be an email or phone number; see complaints.backends
 
 
 class AllowAnyTokenRefreshView(TokenRefreshView):
     permission_classes = (AllowAny,)
+    serializer_class = ScopedTokenRefreshSerializer
 
 
 urlpatterns = [
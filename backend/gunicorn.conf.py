@@ -0,0 +1,23 @@
+"""Gunicorn settings for both serving profiles.
+
+    DJANGO_SERVER_MODE=wsgi  gunicorn -c gunicorn.conf.py   # sync workers (default)
+    DJANGO_SERVER_MODE=asgi  gunicorn -c gunicorn.conf.py   # uvicorn workers, async read views
+"""
+
+import os
+
+mode = os.environ.get("DJANGO_SERVER_MODE", "wsgi")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+accesslog = "-"
+errorlog = "-"
+
+if mode == "asgi":
+    wsgi_app = "core.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+    # SSE streams stay open; don't let the arbiter kill idle-looking workers
+    timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+else:
+    wsgi_app = "core.wsgi:application"
+    timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
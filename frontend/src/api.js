@@ -19,4 +19,12 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// Follow a DRF `next` link against our own baseURL: only its path below /api/
+// and its query (the cursor) are used, so the scheme or host the backend saw
+// behind a proxy cannot turn an https page's request into http
+export const getNextPage = (next) => {
+  const url = new URL(next, api.defaults.baseURL);
+  return api.get(url.pathname.replace(/^.*?\/api\//, '') + url.search);
+};
+
 export default api;
@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
-import api from '../api';
+import api, { getNextPage } from '../api';
 import './Dashboard.css';
 import './AdminPanel.css';
 
@@ -9,6 +9,8 @@ export default function AdminPanel() {
   const [userName, setUserName] = useState('');
   const [role, setRole] = useState('user');
   const [complaints, setComplaints] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [statusMessage, setStatusMessage] = useState('');
@@ -23,9 +25,14 @@ export default function AdminPanel() {
       return;
     }
     loadProfile();
-    loadComplaints();
   }, [navigate]);
 
+  useEffect(() => {
+    if (localStorage.getItem('accessToken')) {
+      loadComplaints();
+    }
+  }, [filterStatus]);
+
   const loadProfile = async () => {
     try {
       const { data } = await api.get('me/');
@@ -42,8 +49,10 @@ export default function AdminPanel() {
 
   const loadComplaints = async () => {
     try {
-      const { data } = await api.get('complaints/');
-      setComplaints(data);
+      const params = filterStatus === 'All' ? {} : { status: filterStatus };
+      const { data } = await api.get('complaints/', { params });
+      setComplaints(data.results);
+      setNextPage(data.next);
     } catch (err) {
       setError('Failed to load complaints.');
     } finally {
@@ -51,6 +60,21 @@ export default function AdminPanel() {
     }
   };
 
+  // The list is cursor-paginated; `next` is an absolute URL carrying the filter
+  const loadMore = async () => {
+    if (!nextPage) return;
+    setLoadingMore(true);
+    try {
+      const { data } = await getNextPage(nextPage);
+      setComplaints((current) => [...current, ...data.results]);
+      setNextPage(data.next);
+    } catch (err) {
+      setError('Failed to load more complaints.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const allowedActions = (status) => {
     if (status === 'Pending') return ['In Progress', 'Rejected'];
     if (status === 'In Progress') return ['Resolved'];
@@ -76,10 +100,6 @@ export default function AdminPanel() {
     }
   };
 
-  const filteredComplaints = complaints.filter((c) =>
-    filterStatus === 'All' ? true : c.status === filterStatus
-  );
-
   if (loading) {
     return (
       <div className="dashboard">
@@ -128,14 +148,14 @@ export default function AdminPanel() {
 
             {error && <div className="error-message">{error}</div>}
 
-            {filteredComplaints.length === 0 ? (
+            {complaints.length === 0 ? (
               <div className="empty-state">
                 <div className="empty-icon">📭</div>
                 <p>No complaints assigned to your office yet.</p>
               </div>
             ) : (
               <div className="complaint-list-admin">
-                {filteredComplaints.map((complaint) => (
+                {complaints.map((complaint) => (
                   <div
                     key={complaint.id}
                     className="complaint-item-admin"
@@ -159,6 +179,11 @@ export default function AdminPanel() {
                     <p className="complaint-item-user">Submitted by: <strong>{complaint.user}</strong></p>
                   </div>
                 ))}
+                {nextPage && (
+                  <button className="btn-load-more" onClick={loadMore} disabled={loadingMore}>
+                    {loadingMore ? 'Loading...' : 'Load more'}
+                  </button>
+                )}
               </div>
             )}
           </>
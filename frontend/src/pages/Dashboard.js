@@ -17,35 +17,30 @@ export default function Dashboard() {
       navigate('/login');
       return;
     }
-    loadUser();
-    loadComplaints();
+    loadDashboard();
   }, [navigate]);
 
-  const loadUser = async () => {
+  const loadDashboard = async () => {
     try {
-      const { data } = await api.get('me/');
-      const displayName = (data.full_name && data.full_name.trim()) || data.email;
+      // Profile, latest complaints and counts in one round trip
+      const { data } = await api.get('bootstrap/', { params: { page_size: 5 } });
+      const profile = data.profile;
+      const displayName = (profile.full_name && profile.full_name.trim()) || profile.email;
       setUser(displayName);
-      setRole(data.role || 'user');
-    } catch (err) {
-      setUser('User');
-    }
-  };
+      setRole(profile.role || 'user');
+      setComplaints(data.complaints.results);
 
-  const loadComplaints = async () => {
-    try {
-      const { data } = await api.get('complaints/');
-      setComplaints(data.slice(0, 5));
-      
-      // Calculate stats
-      const total = data.length;
-      const pending = data.filter(c => c.status === 'Pending').length;
-      const inProgress = data.filter(c => c.status === 'In Progress').length;
-      const resolved = data.filter(c => c.status === 'Resolved').length;
-      const rejected = data.filter(c => c.status === 'Rejected').length;
+      // Dashboard tiles come from the server-side summary
+      const counts = data.counts;
+      const total = counts.total;
+      const pending = counts.by_status['Pending'] || 0;
+      const inProgress = counts.by_status['In Progress'] || 0;
+      const resolved = counts.by_status['Resolved'] || 0;
+      const rejected = counts.by_status['Rejected'] || 0;
       
       setStats({ total, pending, inProgress, resolved, rejected });
     } catch (err) {
+      setUser('User');
       console.error('Failed to load complaints');
     } finally {
       setLoading(false);
@@ -1,12 +1,14 @@
 import { useState, useEffect } from 'react';
 import { useNavigate, Link } from 'react-router-dom';
-import api from '../api';
+import api, { getNextPage } from '../api';
 import './TrackComplaints.css';
 
 export default function TrackComplaints() {
   const navigate = useNavigate();
   const [complaints, setComplaints] = useState([]);
   const [filteredComplaints, setFilteredComplaints] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filterStatus, setFilterStatus] = useState('All Statuses');
   const [loading, setLoading] = useState(true);
   const [user, setUser] = useState('');
@@ -15,39 +17,51 @@ export default function TrackComplaints() {
   useEffect(() => {
     const token = localStorage.getItem('accessToken');
     if (!token) navigate('/login');
-    loadProfile();
-    loadComplaints();
+    loadPage();
   }, [navigate]);
 
-  const loadProfile = async () => {
+  const loadPage = async () => {
     try {
-      const { data } = await api.get('me/');
-      const displayName = (data.full_name && data.full_name.trim()) || data.email;
+      // Profile and complaints in one round trip
+      const { data } = await api.get('bootstrap/');
+      const profile = data.profile;
+      const displayName = (profile.full_name && profile.full_name.trim()) || profile.email;
       setUser(displayName);
-      setRole(data.role || 'user');
+      setRole(profile.role || 'user');
+      setComplaints(data.complaints.results);
+      setFilteredComplaints(data.complaints.results);
+      setNextPage(data.complaints.next);
     } catch (err) {
       setUser(localStorage.getItem('user') || 'User');
-    }
-  };
-
-  const loadComplaints = async () => {
-    try {
-      const { data } = await api.get('complaints/');
-      setComplaints(data);
-      setFilteredComplaints(data);
-    } catch (err) {
       console.error('Failed to load complaints');
     } finally {
       setLoading(false);
     }
   };
 
+  const filterByStatus = (list, status) => (
+    status === 'All Statuses' ? list : list.filter(c => c.status === status)
+  );
+
   const handleFilterChange = (status) => {
     setFilterStatus(status);
-    if (status === 'All Statuses') {
-      setFilteredComplaints(complaints);
-    } else {
-      setFilteredComplaints(complaints.filter(c => c.status === status));
+    setFilteredComplaints(filterByStatus(complaints, status));
+  };
+
+  // The list is cursor-paginated; `next` is an absolute URL for the following page
+  const loadMore = async () => {
+    if (!nextPage) return;
+    setLoadingMore(true);
+    try {
+      const { data } = await getNextPage(nextPage);
+      const all = [...complaints, ...data.results];
+      setComplaints(all);
+      setFilteredComplaints(filterByStatus(all, filterStatus));
+      setNextPage(data.next);
+    } catch (err) {
+      console.error('Failed to load more complaints');
+    } finally {
+      setLoadingMore(false);
     }
   };
 
@@ -185,6 +199,12 @@ export default function TrackComplaints() {
               <Link to="/submit" className="btn-primary">Submit Your First Complaint</Link>
             </div>
           )}
+
+          {!loading && nextPage && (
+            <button className="btn-load-more" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          )}
         </section>
       </main>
     </div>